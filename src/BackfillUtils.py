@@ -0,0 +1,152 @@
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from LogUtils import iter_segment_lines, ordered_log_segments
+from TelemetryUtils import FILE_PREFIX, FILE_SUFFIX, pack_record, write_wall_clock_file
+
+# monitor_loop 写出的监控行（三种模式）：
+#   自定义：CPU: 72.0℃ [3800转] | GPU: 65.0℃ [3000转] | CPU目标: 3150转 | GPU目标: 2800转 | 系统模式：狂暴模式
+#   自动：  CPU: 72.0℃ 自动 [3800转] | GPU: 65.0℃ 自动 [3000转] | 系统模式：狂暴模式
+#   强冷：  CPU: 72.0℃ | GPU: 65.0℃ | 强冷模式 | 系统模式：狂暴模式
+# 行尾可能带有 " | 省略N条"
+MONITOR_LINE = re.compile(
+    r"CPU: (-?\d+(?:\.\d+)?)℃( 自动)?(?: \[(\d+)转\])? \| "
+    r"GPU: (-?\d+(?:\.\d+)?)℃(?: 自动)?(?: \[(\d+)转\])? \| (.*)$"
+)
+TARGETS = re.compile(r"CPU目标: (\d+)转 \| GPU目标: (\d+)转")
+PERF_MODE = re.compile(r"系统模式：([^ |]+)")
+
+PERF_MODE_CODE = {"狂暴模式": 2, "静音游戏": 1, "超长续航": 0}
+BACKFILL_SUFFIX = "_log"  # 导入文件名：telemetry_YYYYMMDD_log.bin（重复导入会覆盖）
+
+
+def parse_monitor_line(line):
+    """
+    解析单条监控日志
+    :return: (CPU温度, GPU温度, CPU转速, GPU转速, CPU目标, GPU目标, 风扇模式, 性能模式代码)；不是监控行返回None
+    强冷模式的日志没有转速，记为0
+    """
+    if "℃" not in line:  # 快速排除非监控行
+        return None
+    match = MONITOR_LINE.search(line)
+    if not match:
+        return None
+    cpu_temp, auto, cpu_rpm, gpu_temp, gpu_rpm, rest = match.groups()
+
+    cpu_target = gpu_target = None
+    if rest.startswith("强冷模式"):
+        fan_mode = "full"
+    elif auto or "切换至自动" in rest:
+        fan_mode = "auto"
+    else:
+        targets = TARGETS.match(rest)
+        if targets:
+            fan_mode = "manual"
+            cpu_target, gpu_target = int(targets.group(1)), int(targets.group(2))
+        elif "切换至自定义" in rest:
+            fan_mode = "manual"
+        else:
+            fan_mode = "auto"  # 自定义模式下低温自动切换为自动风扇
+
+    perf = PERF_MODE.search(rest)
+    perf_code = PERF_MODE_CODE.get(perf.group(1), -1) if perf else -1
+    return (float(cpu_temp), float(gpu_temp), int(cpu_rpm or 0), int(gpu_rpm or 0),
+            cpu_target, gpu_target, fan_mode, perf_code)
+
+
+def iter_segment_samples(path):
+    """流式解析单个日志分段，产出 (日期序数, 墙钟时间戳, 解析结果)"""
+    day_ordinal = midnight = None
+    for key, line in iter_segment_lines(path):
+        sample = parse_monitor_line(line)
+        if sample is None:
+            continue
+        ordinal, seconds = divmod(key, 86400)
+        if ordinal != day_ordinal:
+            day_ordinal = ordinal
+            midnight = datetime.fromordinal(ordinal).timestamp()  # 当地零点
+        yield ordinal, midnight + seconds, sample
+
+
+def parse_segment(path):
+    """
+    解析单个分段并按天打包为遥测记录（可在子进程中执行，返回紧凑的字节串减少进程间传输）
+    :return: [(YYYYMMDD, 已打包记录)]，按时间顺序
+    """
+    chunks = []
+    day_ordinal = None
+    buffer = bytearray()
+    for ordinal, timestamp, sample in iter_segment_samples(path):
+        if ordinal != day_ordinal:
+            if buffer:
+                chunks.append((datetime.fromordinal(day_ordinal).strftime("%Y%m%d"), bytes(buffer)))
+                buffer = bytearray()
+            day_ordinal = ordinal
+        buffer += pack_record(timestamp, *sample)
+    if buffer:
+        chunks.append((datetime.fromordinal(day_ordinal).strftime("%Y%m%d"), bytes(buffer)))
+    return chunks
+
+
+def backfill_logs(log_dir, out_dir, processes=None, progress=None):
+    """
+    将文本日志导入为遥测文件（每天一个 telemetry_YYYYMMDD_log.bin）
+    分段按时间顺序解析，多进程时结果仍按分段顺序写出
+    :param processes: 进程数；None/1 在当前进程内解析
+    :param progress: 回调 progress(已完成分段数, 分段总数, 分段路径)
+    :return: {日期: 记录条数}
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    segments = ordered_log_segments(log_dir)
+    by_day = {}
+
+    def write_days(results):
+        # 分段按时间顺序到达，每天的数据攒齐（进入下一天）后写出
+        current_day, current_chunks = None, []
+        for index, chunks in enumerate(results):
+            for day, data in chunks:
+                if day != current_day:
+                    if current_chunks:
+                        _write_day(out_dir, current_day, current_chunks, by_day)
+                    current_day, current_chunks = day, []
+                current_chunks.append(data)
+            if progress:
+                progress(index + 1, len(segments), segments[index])
+        if current_chunks:
+            _write_day(out_dir, current_day, current_chunks, by_day)
+
+    if processes and processes > 1 and len(segments) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            write_days(executor.map(parse_segment, segments))
+    else:
+        write_days(map(parse_segment, segments))
+    return by_day
+
+
+def _write_day(out_dir, day, chunks, by_day):
+    """写出一天的记录；同一天在本次导入中再次出现时（跨午夜的分段）追加到已写出的文件"""
+    path = os.path.join(out_dir, f"{FILE_PREFIX}{day}{BACKFILL_SUFFIX}{FILE_SUFFIX}")
+    count = write_wall_clock_file(path, chunks, append=day in by_day)
+    by_day[day] = by_day.get(day, 0) + count
+
+
+if __name__ == "__main__":
+    # 用法：python BackfillUtils.py <日志目录> <遥测目录> [进程数]
+    import multiprocessing
+    import time
+
+    multiprocessing.freeze_support()
+    if len(sys.argv) < 3:
+        print("用法：python BackfillUtils.py <日志目录> <遥测目录> [进程数]")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    result = backfill_logs(sys.argv[1], sys.argv[2],
+                           processes=int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count(),
+                           progress=lambda done, total, path: print(f"[{done}/{total}] {os.path.basename(path)}"))
+    for day, count in sorted(result.items()):
+        print(f"{day}：{count}条")
+    print(f"共导入{sum(result.values())}条，耗时{time.perf_counter() - start:.1f}秒")
@@ -1,9 +1,99 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk, ImageEnhance
+from PIL import Image, ImageTk
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
+import logging
+import queue
 import shutil
+import threading
 import os
 
+MIN_LEVEL_SIZE = 320  # 金字塔最小一级的最短边（像素）
+ALPHA_BUCKETS = 100  # 透明度按1%分档作为缓存键
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """图片文件内容的哈希（缓存键，同一张图重新选择时仍可命中）"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=ALPHA_BUCKETS + 1)
+def alpha_lut(bucket):
+    """透明度档位对应的alpha通道查找表（256项，等价于 ImageEnhance.Brightness 作用于alpha通道）"""
+    factor = bucket / ALPHA_BUCKETS
+    return [min(255, int(i * factor)) for i in range(256)]
+
+
+def decode_image(path, max_size):
+    """
+    解码图片，尺寸直接降到不小于 max_size 的最小级别（两边都不小于，窗口铺满时不放大）
+    JPEG 使用 draft 模式在解码阶段按1/2、1/4、1/8缩小；其他格式解码后用 reduce() 整数倍缩小
+    :return: 已加载的图片（RGB/RGBA）
+    """
+    with Image.open(path) as image:
+        if image.format == "JPEG":
+            image.draft("RGB", max_size)
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        factor = min(image.width // max_size[0], image.height // max_size[1])
+        if factor >= 2:
+            image = image.reduce(factor)
+        return image
+
+
+def build_pyramid(image, min_size=MIN_LEVEL_SIZE):
+    """
+    预缩放金字塔：[原图, 1/2, 1/4, ...]，最短边不小于 min_size
+    每一级用 reduce(2) 从上一级生成（按块平均，开销很小）
+    """
+    levels = [image]
+    while min(levels[-1].size) // 2 >= min_size:
+        levels.append(levels[-1].reduce(2))
+    return levels
+
+
+class FrameCache:
+    """
+    已渲染背景帧的LRU缓存，按像素内存估算总大小
+    :param max_bytes: 内存上限（超出时淘汰最久未使用的帧）
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._frames = OrderedDict()  # 键 -> (PhotoImage, 字节数)
+
+    def get(self, key):
+        entry = self._frames.get(key)
+        if entry is None:
+            return None
+        self._frames.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, frame, width, height):
+        size = width * height * 4
+        if size > self.max_bytes:
+            return
+        old = self._frames.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old[1]
+        self._frames[key] = (frame, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted) = self._frames.popitem(last=False)
+            self.total_bytes -= evicted
+
+    def clear(self):
+        self._frames.clear()
+        self.total_bytes = 0
+
 
 class BackgroundImageComponent:
     """
@@ -22,9 +112,19 @@ class BackgroundImageComponent:
         self.init_transparency = init_transparency  # 初始透明度
 
         # 背景图核心变量
-        self.bg_original = None  # 原始背景图（未缩放）
+        self.bg_original = None  # 原始背景图的工作副本（不超过屏幕分辨率和见过的最大窗口尺寸）
         self.bg_image = None  # 缩放后的背景图
         self.bg_image_transparent = None  # 带透明度的背景图
+        self.bg_preview_source = None  # 拖动缩放时预览用的小尺寸原图（金字塔最小一级）
+        self.bg_levels = []  # 原图的预缩放金字塔
+        self.bg_hash = None  # 原图文件哈希
+        self.frame_cache = FrameCache()  # (哈希, 宽, 高, 透明度档) -> PhotoImage
+        self._loaded_path = None  # 当前背景图的文件路径
+        self._decoded_size = None  # 解码时的尺寸（工作副本裁减前）
+        self._max_window = (0, 0)  # 见过的最大窗口尺寸
+        self._load_generation = 0  # 每次加载递增，丢弃过期的解码结果
+        self._load_results = queue.Queue()  # 解码线程 -> Tk线程
+        self._load_poll_job = None
         self.bg_label = tk.Label(master,bd=0, highlightthickness=0)
         self.bg_label.place(x=0, y=0, relwidth=1, relheight=1)
         self.bg_label.lower()  # 置于最底层
@@ -32,6 +132,21 @@ class BackgroundImageComponent:
         # 透明度变量（使用外部传入的初始值）
         self.transparency = tk.DoubleVar(value=self.init_transparency)
 
+        # 窗口缩放合并：拖动过程中按间隔显示低质量预览，停止拖动后做一次高质量缩放
+        self.preview_interval = 50  # 预览最小刷新间隔（毫秒）
+        self.resize_delay = 200  # 最后一次缩放事件后多久做高质量缩放（毫秒）
+        self._preview_job = None
+        self._resize_job = None
+        self._rendered_size = None  # 当前高质量背景图的尺寸
+        self._scaled_size = None  # bg_image 对应的高质量尺寸（预览图为None）
+        self._rgba = None  # bg_image 的RGBA副本，调节透明度时原地替换alpha通道（复用，不再每次复制）
+        self._alpha = None  # bg_image 的原始alpha通道
+
+        # 滑块拖动时按帧预算合并回调，只应用最新值
+        self.slider_interval = 33  # 毫秒
+        self._slider_job = None
+        self._pending_alpha = None
+
         # 绑定窗口缩放事件（自适应）
         self.master.bind("<Configure>", self.on_window_resize)
 
@@ -89,7 +204,7 @@ class BackgroundImageComponent:
             resolution=0.05,
             orient="horizontal",
             length=200,
-            command=self.update_bg_transparency
+            command=self.on_transparency_slider
         )
         transparency_slider.pack(side="left", padx=10)
 
@@ -122,72 +237,202 @@ class BackgroundImageComponent:
             messagebox.showerror("错误", f"拷贝图片失败：{str(e)}")
 
     def load_bg_image(self, image_path):
-        """加载背景图（外部可调用）"""
+        """
+        加载背景图（外部可调用）：解码、哈希和金字塔在后台线程完成，完成后在Tk线程替换背景
+        解码尺寸不超过屏幕分辨率
+        """
         try:
             if not os.path.exists(image_path):
                 raise FileNotFoundError(f"图片不存在：{image_path}")
 
-            # 保存原始图片（用于缩放）
-            self.bg_original = Image.open(image_path)
-            print(f"原始图片尺寸：{self.bg_original.size}")
-            # 初始缩放到窗口大小
-            self.update_bg_size()
+            max_size = (self.master.winfo_screenwidth(), self.master.winfo_screenheight())
+            self._load_generation += 1
+            threading.Thread(target=self._decode_worker, args=(image_path, max_size, self._load_generation),
+                             name="BackgroundDecode", daemon=True).start()
+            if self._load_poll_job is None:
+                self._load_poll_job = self.master.after(50, self._poll_load)
 
         except Exception as e:
             messagebox.showerror("错误", f"加载背景图失败：{str(e)}")
 
-    def update_bg_size(self):
-        """更新背景图尺寸（自适应窗口）"""
+    def _decode_worker(self, image_path, max_size, generation):
+        """后台线程：只做解码和预处理，不访问任何Tk对象"""
+        try:
+            image = decode_image(image_path, max_size)
+            result = (image, file_hash(image_path), build_pyramid(image))
+        except Exception as e:
+            result = e
+        self._load_results.put((generation, image_path, result))
+
+    def _poll_load(self):
+        """Tk线程轮询解码结果"""
+        self._load_poll_job = None
+        try:
+            generation, image_path, result = self._load_results.get_nowait()
+        except queue.Empty:
+            self._load_poll_job = self.master.after(50, self._poll_load)
+            return
+
+        if generation != self._load_generation:
+            # 已有更新的加载请求，继续等待
+            self._load_poll_job = self.master.after(50, self._poll_load)
+            return
+        if isinstance(result, Exception):
+            messagebox.showerror("错误", f"加载背景图失败：{str(result)}")
+            return
+
+        image, self.bg_hash, self.bg_levels = result
+        logging.debug("背景图工作尺寸：%s", image.size)
+        self.bg_original = image
+        self.bg_preview_source = self.bg_levels[-1]
+        self._loaded_path = image_path
+        self._decoded_size = image.size
+        self.bg_image = self._rgba = None
+        self._rendered_size = self._scaled_size = None
+        # 初始缩放到窗口大小
+        self.update_bg_size()
+
+    def _fit_working_copy(self, size):
+        """
+        工作副本只保留覆盖见过的最大窗口所需的金字塔层级，更大的层级释放
+        窗口超过当前工作副本且解码时有更高分辨率时，重新从文件加载
+        """
+        self._max_window = (max(self._max_window[0], size[0]), max(self._max_window[1], size[1]))
+        max_w, max_h = self._max_window
+        while len(self.bg_levels) > 1 and self.bg_levels[1].width >= max_w and self.bg_levels[1].height >= max_h:
+            self.bg_levels.pop(0)
+        self.bg_original = self.bg_levels[0]
+
+        if (max_w > self.bg_original.width or max_h > self.bg_original.height) \
+                and self.bg_original.size != self._decoded_size and self._load_poll_job is None:
+            self.load_bg_image(self._loaded_path)
+
+    def _window_size(self):
+        """当前父容器尺寸（初始化时尺寸异常则使用默认值）"""
+        win_width = self.master.winfo_width()
+        win_height = self.master.winfo_height()
+        return (win_width if win_width > 1 else 800,
+                win_height if win_height > 1 else 600)
+
+    def update_bg_size(self, preview=False):
+        """
+        更新背景图尺寸（自适应窗口）
+        :param preview: True-从小尺寸原图快速缩放（拖动窗口时使用），False-高质量缩放（缓存命中时不缩放）
+        """
         if self.bg_original is None:
             return
 
         try:
-            # 获取当前父容器尺寸
-            win_width = self.master.winfo_width()
-            win_height = self.master.winfo_height()
-            # 避免初始化时尺寸异常
-            win_width = win_width if win_width > 0 else 800
-            win_height = win_height if win_height > 0 else 600
-
-            # 缩放图片
-            self.bg_image = self.bg_original.resize(
-                (win_width, win_height),
-                Image.Resampling.LANCZOS
-            )
+            size = self._window_size()
+            if preview:
+                self.bg_image = self.bg_preview_source.resize(size, Image.Resampling.BILINEAR)
+                self._rgba = None
+                self._rendered_size = self._scaled_size = None
+            else:
+                self._fit_working_copy(size)
+                # 实际缩放推迟到缓存未命中时（_scaled_image）
+                self._rendered_size = size
             # 应用当前透明度
             self.update_bg_transparency(self.transparency.get())
 
         except Exception as e:
             print(f"缩放背景图失败：{str(e)}")
 
+    def _source_level(self, size):
+        """金字塔中不小于目标尺寸的最小一级（都不够大时用原图）"""
+        for level in reversed(self.bg_levels):
+            if level.width >= size[0] and level.height >= size[1]:
+                return level
+        return self.bg_original
+
+    def _scaled_image(self, size):
+        """高质量缩放到 size，从最接近的金字塔层级开始缩放"""
+        if self._scaled_size != size:
+            self.bg_image = self._source_level(size).resize(size, Image.Resampling.LANCZOS)
+            self._scaled_size = size
+            self._rgba = None
+        return self.bg_image
+
     def update_bg_transparency(self, value):
-        """更新背景图透明度（外部可调用）"""
-        if self.bg_image is None:
+        """
+        更新背景图透明度（外部可调用）；高质量帧按 (图片, 尺寸, 透明度) 缓存
+        工作副本小于窗口（等待重新加载高分辨率）时放大得到的帧不缓存，加载完成后重新缩放
+        """
+        if self.bg_original is None or (self._rendered_size is None and self.bg_image is None):
             return
 
         try:
-            alpha = float(value)
-            img_with_alpha = self.bg_image.copy()
-
-            # 处理透明通道
-            if img_with_alpha.mode != 'RGBA':
-                img_with_alpha = img_with_alpha.convert('RGBA')
-
-            # 调整透明度
-            alpha_channel = img_with_alpha.split()[3]
-            alpha_channel = ImageEnhance.Brightness(alpha_channel).enhance(alpha)
-            img_with_alpha.putalpha(alpha_channel)
+            bucket = max(0, min(round(float(value) * ALPHA_BUCKETS), ALPHA_BUCKETS))
+            key = None
+            cacheable = False
+            if self._rendered_size is not None:
+                key = (self.bg_hash, *self._rendered_size, bucket)
+                source = self._source_level(self._rendered_size)
+                cacheable = source.width >= self._rendered_size[0] and source.height >= self._rendered_size[1]
+                frame = self.frame_cache.get(key)
+                if frame is not None:
+                    self.bg_image_transparent = frame
+                    self.bg_label.config(image=frame)
+                    return
+                self._scaled_image(self._rendered_size)
+
+            # 背景图变化后才重新拆出alpha通道
+            if self._rgba is None:
+                self._rgba = self.bg_image.convert('RGBA')
+                self._alpha = self._rgba.getchannel('A')
+
+            # 调整透明度：查找表作用于原始alpha通道，结果原地写回复用的RGBA图
+            self._rgba.putalpha(self._alpha.point(alpha_lut(bucket)))
+            img_with_alpha = self._rgba
 
             # 更新背景
             self.bg_image_transparent = ImageTk.PhotoImage(img_with_alpha)
             self.bg_label.config(image=self.bg_image_transparent)
+            if cacheable:
+                self.frame_cache.put(key, self.bg_image_transparent, *img_with_alpha.size)
 
         except Exception as e:
             messagebox.showerror("错误", f"调整透明度失败：{str(e)}")
 
+    def on_transparency_slider(self, value):
+        """透明度滑块回调：拖动时每 slider_interval 毫秒最多渲染一次，只应用最新值"""
+        self._pending_alpha = value
+        if self._slider_job is None:
+            self._slider_job = self.master.after(self.slider_interval, self._apply_pending_alpha)
+
+    def _apply_pending_alpha(self):
+        self._slider_job = None
+        value, self._pending_alpha = self._pending_alpha, None
+        if value is not None:
+            self.update_bg_transparency(value)
+
     def on_window_resize(self, event):
-        """窗口缩放事件回调"""
-        if event.widget == self.master and self.bg_original is not None:
+        """
+        窗口缩放事件回调：拖动窗口边缘时每秒触发几十次，只合并调度，不在回调内缩放
+        预览按 preview_interval 节流；高质量缩放在最后一次事件 resize_delay 毫秒后执行一次
+        """
+        if event.widget != self.master or self.bg_original is None:
+            return
+        if (event.width, event.height) == self._rendered_size and self._resize_job is None:
+            return  # 尺寸未变化（如窗口移动）
+
+        if self._preview_job is None:
+            self._preview_job = self.master.after(self.preview_interval, self._render_preview)
+        if self._resize_job is not None:
+            self.master.after_cancel(self._resize_job)
+        self._resize_job = self.master.after(self.resize_delay, self._render_final)
+
+    def _render_preview(self):
+        self._preview_job = None
+        if self._resize_job is not None:  # 高质量缩放已完成时不再显示预览
+            self.update_bg_size(preview=True)
+
+    def _render_final(self):
+        self._resize_job = None
+        if self._preview_job is not None:
+            self.master.after_cancel(self._preview_job)
+            self._preview_job = None
+        if self._window_size() != self._rendered_size:
             self.update_bg_size()
 
     def get_current_transparency(self):
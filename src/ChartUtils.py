@@ -0,0 +1,142 @@
+import tkinter as tk
+import matplotlib
+
+matplotlib.use('TkAgg')  # 强制指定Tk后端，避免渲染冲突
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+plt.rcParams["font.family"] = ["SimHei"]
+plt.rcParams["axes.unicode_minus"] = False
+
+
+class TelemetryChartWidget(tk.Frame):
+    """
+    温度/转速历史滚动图（数据来自控制器的遥测环形缓冲，不额外读取硬件）
+    使用blit局部重绘：坐标轴、网格等静态内容缓存为背景，只重绘曲线
+    窗口隐藏到托盘时只做低频检查，不做绘制
+    :param telemetry: TelemetryRingBuffer 实例
+    :param minutes: 显示最近多少分钟
+    :param max_fps: 最大刷新帧率
+    """
+
+    def __init__(self, master=None, telemetry=None, minutes=10, max_fps=2, **kwargs):
+        super().__init__(master, **kwargs)
+        self.telemetry = telemetry
+        self.minutes = minutes
+        self.interval_ms = int(1000 / max_fps)
+        self.hidden_interval_ms = 2000
+
+        self.colors = {
+            'cpu': '#E74C3C',
+            'gpu': '#27AE60',
+            'grid': '#EEEEEE',
+            'text': '#333333'
+        }
+
+        self.fig = plt.Figure(figsize=(7, 2.4), dpi=100)
+        self.fig.subplots_adjust(left=0.08, right=0.98, top=0.92, bottom=0.15, wspace=0.2)
+        self.ax_temp = self.fig.add_subplot(121)
+        self.ax_rpm = self.fig.add_subplot(122)
+        self._init_axes(self.ax_temp, "温度 (℃)", (20, 100))
+        self._init_axes(self.ax_rpm, "转速 (转)", (0, 6500))
+
+        # 动态曲线（animated=True：不参与常规绘制，只通过blit更新）
+        self.cpu_temp_line, = self.ax_temp.plot([], [], color=self.colors['cpu'], lw=1.5, label="CPU", animated=True)
+        self.gpu_temp_line, = self.ax_temp.plot([], [], color=self.colors['gpu'], lw=1.5, label="GPU", animated=True)
+        self.cpu_rpm_line, = self.ax_rpm.plot([], [], color=self.colors['cpu'], lw=1.5, label="CPU", animated=True)
+        self.gpu_rpm_line, = self.ax_rpm.plot([], [], color=self.colors['gpu'], lw=1.5, label="GPU", animated=True)
+        self.ax_temp.legend(loc="upper left", fontsize=8, frameon=False)
+        self.lines = (self.cpu_temp_line, self.gpu_temp_line, self.cpu_rpm_line, self.gpu_rpm_line)
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas_widget = self.canvas.get_tk_widget()
+        self.canvas_widget.pack(fill=tk.BOTH, expand=True)
+
+        self._background = None  # 缓存的静态背景
+        self._last_count = -1  # 上次绘制时的遥测写入计数
+        self._job = None  # 定时刷新任务
+
+        # 完整重绘（首次显示、缩放）后重新缓存背景
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        # 重新显示时立即恢复刷新（托盘的 withdraw/deiconify 不一定触发子控件的 Map/Unmap，
+        # 隐藏状态由 _tick 自行低频检查）
+        self.bind('<Map>', lambda e: self.start())
+
+    def _init_axes(self, ax, ylabel, ylim):
+        ax.set_xlim(-self.minutes, 0)
+        ax.set_ylim(*ylim)
+        ax.tick_params(labelsize=8, colors=self.colors['text'])
+        ax.grid(True, color=self.colors['grid'], linewidth=1, linestyle='--')
+        ax.set_ylabel(ylabel, fontsize=8, color=self.colors['text'])
+        ax.set_xlabel("时间 (分钟)", fontsize=8, color=self.colors['text'], labelpad=1)
+        for side in ('top', 'right'):
+            ax.spines[side].set_visible(False)
+
+    def start(self):
+        """开始定时刷新（已在低频检查时立即切回正常帧率）"""
+        if self._job is not None:
+            self.after_cancel(self._job)
+        self._last_count = -1
+        self._job = self.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        """停止定时刷新（控件销毁前调用）"""
+        if self._job is not None:
+            self.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self):
+        self._job = None
+        if not self.winfo_viewable():
+            # 隐藏时不绘制，但保持低频检查，恢复显示后自动继续刷新
+            self._job = self.after(self.hidden_interval_ms, self._tick)
+            return
+        self.refresh()
+        self._job = self.after(self.interval_ms, self._tick)
+
+    def _on_draw(self, event):
+        """完整重绘后缓存背景并补画动态曲线"""
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for line in self.lines:
+            line.axes.draw_artist(line)
+
+    def refresh(self, force=False):
+        """有新数据时更新曲线，只blit动态部分"""
+        if self.telemetry is None:
+            return
+        count = self.telemetry.count
+        if count == self._last_count and not force:
+            return
+        self._last_count = count
+
+        snap = self.telemetry.snapshot(seconds=self.minutes * 60)
+        if not len(snap["time"]):
+            return
+        x = (snap["time"] - snap["time"][-1]) / 60
+        self.cpu_temp_line.set_data(x, snap["cpu_temp"])
+        self.gpu_temp_line.set_data(x, snap["gpu_temp"])
+        self.cpu_rpm_line.set_data(x, snap["cpu_rpm"])
+        self.gpu_rpm_line.set_data(x, snap["gpu_rpm"])
+
+        # 超出纵轴范围时才扩展坐标轴并完整重绘（很少发生）
+        if self._expand_ylim(self.ax_temp, max(snap["cpu_temp"].max(), snap["gpu_temp"].max())) | \
+                self._expand_ylim(self.ax_rpm, max(snap["cpu_rpm"].max(), snap["gpu_rpm"].max())):
+            self.canvas.draw()
+            return
+
+        if self._background is None:
+            self.canvas.draw()
+            return
+
+        self.canvas.restore_region(self._background)
+        for line in self.lines:
+            line.axes.draw_artist(line)
+        self.canvas.blit(self.fig.bbox)
+
+    @staticmethod
+    def _expand_ylim(ax, value):
+        low, high = ax.get_ylim()
+        if value <= high:
+            return False
+        ax.set_ylim(low, value * 1.1)
+        return True
@@ -0,0 +1,43 @@
+import numpy as np
+
+# 曲线控制点编辑的公共逻辑（与绘图实现无关，matplotlib 和纯Tk两种曲线组件共用）
+# 坐标统一为像素坐标数组，形状 (曲线数, 点数, 2)
+
+
+def hit_test(points_px, x, y, radius, selectable=None):
+    """
+    像素空间命中测试：一次计算所有曲线所有控制点到鼠标的距离
+    :param points_px: 控制点像素坐标，形状 (曲线数, 点数, 2)
+    :param radius: 拾取半径（像素，不随坐标轴比例和DPI变化）
+    :param selectable: 可选中的点（布尔数组，形状 (曲线数, 点数)）
+    :return: (曲线序号, 点序号)；半径内没有控制点返回None
+    """
+    dist = np.hypot(points_px[..., 0] - x, points_px[..., 1] - y)
+    if selectable is not None:
+        dist = np.where(selectable, dist, np.inf)
+    flat = int(np.argmin(dist))
+    if dist.flat[flat] > radius:
+        return None
+    curve, index = np.unravel_index(flat, dist.shape)
+    return int(curve), int(index)
+
+
+def points_in_box(points_px, x0, y0, x1, y1):
+    """框选：返回落在矩形内的控制点（布尔数组，形状 (曲线数, 点数)）"""
+    left, right = sorted((x0, x1))
+    low, high = sorted((y0, y1))
+    px, py = points_px[..., 0], points_px[..., 1]
+    return (px >= left) & (px <= right) & (py >= low) & (py <= high)
+
+
+def shift_points(origin, selected, delta, low=0, high=100):
+    """
+    将选中的点整体平移 delta（数据单位），保持相对形状：平移量被限制在所有选中点都不越界的范围内
+    :param origin: 拖拽开始时的数值，形状 (曲线数, 点数)
+    :return: 平移后的整数数组
+    """
+    if not selected.any():
+        return origin.copy()
+    values = origin[selected]
+    delta = min(max(delta, low - values.min()), high - values.max())
+    return np.where(selected, np.rint(origin + delta), origin).astype(int)
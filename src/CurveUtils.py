@@ -5,8 +5,12 @@ import matplotlib
 matplotlib.use('TkAgg')  # 强制指定Tk后端，避免渲染冲突
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.colors import to_rgba
+from matplotlib.patches import Rectangle
 import numpy as np
 
+from CurveEditUtils import hit_test, points_in_box, shift_points
+
 # 设置中文字体和matplotlib样式
 plt.rcParams["font.family"] = ["SimHei"]
 plt.rcParams["axes.unicode_minus"] = False
@@ -52,10 +56,19 @@ class FanCurveWidget(tk.Frame):
         else:
             self._gpu_speed = default_gpu.copy()
 
-        # 拖拽状态
-        self.dragging_curve = None
-        self.dragging_idx = None
-        self.has_dragging_change = False
+        # 拖拽/框选状态（两条曲线的控制点统一按 (曲线, 点) 数组处理）
+        self.curves = ('cpu', 'gpu')
+        self.selected = np.zeros((len(self.curves), len(self.fixed_temps)), dtype=bool)  # 当前选中的控制点
+        self._selectable = np.ones_like(self.selected)
+        self._selectable[:, 0] = False  # 0℃点固定为0，不可选中
+        self._gesture = None  # 'drag'-拖动选中点，'box'-框选
+        self._press_curve = None  # 按下时所在子图的曲线
+        self._press_xy = None  # 按下位置（像素）
+        self._origin = None  # 拖动开始时的转速，形状 (曲线, 点)
+        self._base_selection = None  # 按住shift框选时保留的原选择
+        self._pending_xy = None  # 尚未渲染的鼠标位置（鼠标事件合并到刷新帧）
+        self._frame_job = None
+        self.frame_interval = 16  # 拖拽渲染间隔（毫秒，约60Hz）
 
         # 可编辑状态
         self.editable = True  # 是否可编辑
@@ -76,9 +89,19 @@ class FanCurveWidget(tk.Frame):
             'text': '#999999'
         }
 
+        # 实时工作点覆盖层（当前温度/转速 + 渐隐轨迹）
+        self.overlay_color = '#2C3E50'
+        self.trail_length = 30  # 轨迹点数（监控1秒一次即最近30秒）
+        self._overlay = {}  # 曲线 -> (轨迹散点, 当前点标记)
+
+        # 选中点高亮环和框选矩形
+        self.selection_color = '#3498DB'
+        self._selection = {}  # 曲线 -> 高亮环
+        self._box = {}  # 曲线 -> 框选矩形
+
         # 控制点配置
         self.point_size = 6
-        self.detect_radius = 14
+        self.detect_radius = 14  # 控制点拾取半径（像素，与坐标轴比例和窗口大小无关）
         self.picker_tolerance = 18
 
         # 画布尺寸
@@ -91,6 +114,10 @@ class FanCurveWidget(tk.Frame):
         self.cpu_points = None
         self.gpu_line = None
         self.gpu_points = None
+        # 每个子图的静态背景（坐标轴、网格、文字），曲线通过blit绘制在其上
+        self._backgrounds = {}
+        # 两种状态（可编辑/置灰）的背景位图缓存：(可编辑, 宽, 高) -> {"fig"/子图: 位图}
+        self._state_cache = {}
 
         # 创建画布
         self.canvas = FigureCanvasTkAgg(self.fig, master=self)
@@ -121,7 +148,10 @@ class FanCurveWidget(tk.Frame):
         设置是否可编辑
         :param editable: True-可编辑，False-不可编辑（置灰）
         """
+        if editable == self.editable:
+            return
         self.editable = editable
+        self.clear_selection()
 
         # 更新鼠标样式
         if editable:
@@ -131,10 +161,18 @@ class FanCurveWidget(tk.Frame):
             self.canvas_widget.config(cursor="arrow")
             self.canvas_widget.bind('<Enter>', lambda e: self.canvas_widget.config(cursor="arrow"))
 
-        # 重新绘制图表（应用置灰/恢复颜色）
-        self._init_plot_elements()
-        self.update_plot_data()
-        self.canvas.draw()
+        # 原地修改现有元素的样式（不重建坐标轴）
+        self._apply_style()
+
+        # 该状态的背景位图已缓存时直接贴图，否则完整重绘一次（重绘后自动缓存）
+        cached = self._state_cache.get(self._state_key())
+        if cached is None:
+            self.canvas.draw()
+            return
+        self._backgrounds = {ax: cached[ax] for ax in (self.ax_cpu, self.ax_gpu)}
+        self.canvas.restore_region(cached["fig"])
+        self._draw_curves()
+        self.canvas.blit(self.fig.bbox)
 
     def set_data(self, cpu_data=None, gpu_data=None):
         """核心修复：设置数据时强制维度校验"""
@@ -161,36 +199,181 @@ class FanCurveWidget(tk.Frame):
             self.after_idle(lambda: self.on_data_change(applied_cpu_curve, applied_gpu_curve))
 
     def _init_plot_elements(self):
-        """初始化绘图元素（确保x/y维度匹配）"""
+        """初始化绘图元素（确保x/y维度匹配），只在创建时执行一次，之后只修改元素属性"""
         # 获取当前颜色配置
         colors = self.normal_colors if self.editable else self.gray_colors
 
         # CPU子图（左）
-        self.ax_cpu.clear()
         self._init_subplot_style(self.ax_cpu, "CPU 风扇曲线", colors)
 
         # ========== 关键：x是fixed_temps(10个点)，y是_cpu_speed(10个点) ==========
         self.cpu_line, = self.ax_cpu.plot(self.fixed_temps, self._cpu_speed,
-                                          color=colors['cpu'], linewidth=2, alpha=0.9 if self.editable else 0.7)
+                                          color=colors['cpu'], linewidth=2, alpha=0.9 if self.editable else 0.7,
+                                          animated=True)
         self.cpu_points, = self.ax_cpu.plot(self.fixed_temps, self._cpu_speed,
                                             color=colors['cpu'], marker='o', markersize=self.point_size,
                                             markerfacecolor=colors['cpu'], markeredgecolor='white',
                                             markeredgewidth=1.2,
-                                            linestyle='None',
+                                            linestyle='None', animated=True,
                                             picker=self.picker_tolerance if self.editable else 0)
 
         # GPU子图（右）
-        self.ax_gpu.clear()
         self._init_subplot_style(self.ax_gpu, "GPU 风扇曲线", colors)
         self.gpu_line, = self.ax_gpu.plot(self.fixed_temps, self._gpu_speed,
-                                          color=colors['gpu'], linewidth=2, alpha=0.9 if self.editable else 0.7)
+                                          color=colors['gpu'], linewidth=2, alpha=0.9 if self.editable else 0.7,
+                                          animated=True)
         self.gpu_points, = self.ax_gpu.plot(self.fixed_temps, self._gpu_speed,
                                             color=colors['gpu'], marker='o', markersize=self.point_size,
                                             markerfacecolor=colors['gpu'], markeredgecolor='white',
                                             markeredgewidth=1.2,
-                                            linestyle='None',
+                                            linestyle='None', animated=True,
                                             picker=self.picker_tolerance if self.editable else 0)
 
+        # 工作点覆盖层（在曲线之上）
+        for curve, ax in (('cpu', self.ax_cpu), ('gpu', self.ax_gpu)):
+            trail = ax.scatter([], [], s=16, linewidths=0, color=self.overlay_color, zorder=4, animated=True)
+            current, = ax.plot([], [], linestyle='None', marker='o', markersize=11, markerfacecolor='none',
+                               markeredgecolor=self.overlay_color, markeredgewidth=2, zorder=5, animated=True)
+            self._overlay[curve] = (trail, current)
+
+            ring, = ax.plot([], [], linestyle='None', marker='o', markersize=self.point_size + 6,
+                            markerfacecolor='none', markeredgecolor=self.selection_color, markeredgewidth=1.5,
+                            zorder=3, animated=True)
+            box = Rectangle((0, 0), 0, 0, facecolor=to_rgba(self.selection_color, 0.12),
+                            edgecolor=self.selection_color, linestyle='--', linewidth=1,
+                            visible=False, zorder=6, animated=True)
+            ax.add_patch(box)
+            self._selection[curve] = ring
+            self._box[curve] = box
+
+    def set_operating_points(self, cpu_points=None, gpu_points=None):
+        """
+        更新实时工作点覆盖层（只blit覆盖层所在子图，不触发完整重绘）
+        :param cpu_points: [(温度, 转速%), ...]，按时间从旧到新，最后一个为当前工作点；None表示不更新
+        :param gpu_points: 同上
+        """
+        for curve, points in (('cpu', cpu_points), ('gpu', gpu_points)):
+            if points is None:
+                continue
+            trail, current = self._overlay[curve]
+            points = np.asarray(points, dtype=float).reshape(-1, 2)
+            points = np.clip(points[~np.isnan(points).any(axis=1)], 0, 100)
+            history = points[:-1]
+            trail.set_offsets(history)
+            if len(history):
+                # 越早的点越透明
+                colors = np.tile(to_rgba(self.overlay_color), (len(history), 1))
+                colors[:, 3] = np.linspace(0.05, 0.5, len(history))
+                trail.set_facecolors(colors)
+            current.set_data(points[-1:, 0], points[-1:, 1])
+
+        if self._backgrounds and self.canvas_widget.winfo_viewable():
+            self._blit_curve('cpu')
+            self._blit_curve('gpu')
+
+    def _curve_artists(self, curve):
+        if curve == 'cpu':
+            return self.ax_cpu, (self.cpu_line, self.cpu_points)
+        return self.ax_gpu, (self.gpu_line, self.gpu_points)
+
+    def _layer_artists(self, curve):
+        """子图中每帧blit的全部元素：曲线、控制点、工作点覆盖层、选中高亮和框选矩形"""
+        ax, artists = self._curve_artists(curve)
+        extras = self._overlay.get(curve, ()) + tuple(
+            layer[curve] for layer in (self._selection, self._box) if curve in layer)
+        return ax, artists + extras
+
+    def _speeds(self, curve):
+        return self._cpu_speed if curve == 'cpu' else self._gpu_speed
+
+    def _set_speeds(self, curve, speeds):
+        if curve == 'cpu':
+            self._cpu_speed = speeds
+        else:
+            self._gpu_speed = speeds
+        for artist in self._curve_artists(curve)[1]:
+            artist.set_ydata(speeds)
+
+    def _points_px(self):
+        """两条曲线全部控制点的像素坐标，形状 (曲线, 点, 2)"""
+        return np.stack([
+            self._curve_artists(curve)[0].transData.transform(
+                np.column_stack((self.fixed_temps, self._speeds(curve))))
+            for curve in self.curves
+        ])
+
+    def _sync_selection(self):
+        """按选中状态更新高亮环的位置（不绘制）"""
+        for i, curve in enumerate(self.curves):
+            mask = self.selected[i]
+            self._selection[curve].set_data(np.asarray(self.fixed_temps)[mask],
+                                            np.asarray(self._speeds(curve))[mask])
+
+    def clear_selection(self):
+        """取消选中并结束进行中的拖拽/框选"""
+        if self._frame_job is not None:
+            self.after_cancel(self._frame_job)
+            self._frame_job = None
+        self._gesture = None
+        self._pending_xy = None
+        self.selected[:] = False
+        for box in self._box.values():
+            box.set_visible(False)
+        self._sync_selection()
+
+    def _state_key(self):
+        return self.editable, int(self.fig.bbox.width), int(self.fig.bbox.height)
+
+    def _on_draw(self, event):
+        """完整重绘后缓存各子图背景及当前状态的整图位图，并补画曲线（曲线为animated，不参与常规绘制）"""
+        self._backgrounds = {ax: self.canvas.copy_from_bbox(ax.bbox) for ax in (self.ax_cpu, self.ax_gpu)}
+        # 尺寸变化后旧位图失效
+        size = self._state_key()[1:]
+        self._state_cache = {key: value for key, value in self._state_cache.items() if key[1:] == size}
+        self._state_cache[self._state_key()] = dict(self._backgrounds, fig=self.canvas.copy_from_bbox(self.fig.bbox))
+        self._draw_curves()
+
+    def _draw_curves(self):
+        for curve in self.curves:
+            ax, artists = self._layer_artists(curve)
+            for artist in artists:
+                if artist is not None:
+                    ax.draw_artist(artist)
+
+    def _apply_style(self):
+        """按当前编辑状态原地修改坐标轴、文字、网格和曲线的颜色"""
+        colors = self.normal_colors if self.editable else self.gray_colors
+        for ax in (self.ax_cpu, self.ax_gpu):
+            ax.tick_params(colors=colors['text'])
+            ax.spines['left'].set_color(colors['spine'])
+            ax.spines['bottom'].set_color(colors['spine'])
+            ax.grid(True, which='major', axis='both',
+                    color=colors['grid'], alpha=0.8 if self.editable else 0.5,
+                    linewidth=1, linestyle='--')
+            ax.xaxis.label.set_color(colors['text'])
+            ax.yaxis.label.set_color(colors['text'])
+            ax.title.set_color(colors['text'])
+
+        for curve in ('cpu', 'gpu'):
+            line, points = self._curve_artists(curve)[1]
+            line.set_color(colors[curve])
+            line.set_alpha(0.9 if self.editable else 0.7)
+            points.set_color(colors[curve])
+            points.set_markerfacecolor(colors[curve])
+            points.set_picker(self.picker_tolerance if self.editable else 0)
+
+    def _blit_curve(self, curve):
+        """只重绘一条曲线所在的子图：恢复背景 → 绘制线、控制点、覆盖层和选中高亮 → blit"""
+        ax, artists = self._layer_artists(curve)
+        background = self._backgrounds.get(ax)
+        if background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(background)
+        for artist in artists:
+            ax.draw_artist(artist)
+        self.canvas.blit(ax.bbox)
+
     def _init_subplot_style(self, ax, title, colors):
         """添加100℃刻度的子图样式（支持置灰）"""
         # 90℃右侧空白保留（X轴到100）
@@ -236,37 +419,27 @@ class FanCurveWidget(tk.Frame):
         self._cpu_speed = [max(0, min(int(round(val)), 100)) for val in self._cpu_speed]
         self._gpu_speed = [max(0, min(int(round(val)), 100)) for val in self._gpu_speed]
 
-        # 获取当前颜色配置
-        colors = self.normal_colors if self.editable else self.gray_colors
-
         # 更新绘图数据（确保x/y维度匹配）
-        if self.cpu_line:
-            self.cpu_line.set_ydata(self._cpu_speed)
-            self.cpu_line.set_color(colors['cpu'])
-            self.cpu_line.set_alpha(0.9 if self.editable else 0.7)
-        if self.cpu_points:
-            self.cpu_points.set_ydata(self._cpu_speed)
-            self.cpu_points.set_color(colors['cpu'])
-            self.cpu_points.set_markerfacecolor(colors['cpu'])
-            self.cpu_points.set_picker(self.picker_tolerance if self.editable else 0)
-        if self.gpu_line:
-            self.gpu_line.set_ydata(self._gpu_speed)
-            self.gpu_line.set_color(colors['gpu'])
-            self.gpu_line.set_alpha(0.9 if self.editable else 0.7)
-        if self.gpu_points:
-            self.gpu_points.set_ydata(self._gpu_speed)
-            self.gpu_points.set_color(colors['gpu'])
-            self.gpu_points.set_markerfacecolor(colors['gpu'])
-            self.gpu_points.set_picker(self.picker_tolerance if self.editable else 0)
-
-        # 刷新画布
-        self.canvas.draw_idle()
+        self.cpu_line.set_ydata(self._cpu_speed)
+        self.cpu_points.set_ydata(self._cpu_speed)
+        self.gpu_line.set_ydata(self._gpu_speed)
+        self.gpu_points.set_ydata(self._gpu_speed)
+        self._sync_selection()
+
+        # 背景不变，只blit曲线；尚未完整绘制过时等待首次重绘
+        if self._backgrounds:
+            self._blit_curve('cpu')
+            self._blit_curve('gpu')
+        else:
+            self.canvas.draw_idle()
 
     def _bind_events(self):
         """绑定拖拽事件"""
         self.canvas.mpl_connect('button_press_event', self._on_mouse_press)
         self.canvas.mpl_connect('motion_notify_event', self._on_mouse_move)
         self.canvas.mpl_connect('button_release_event', self._on_mouse_release)
+        # 完整重绘（首次显示、缩放、样式变化）后重新缓存背景
+        self.canvas.mpl_connect('draw_event', self._on_draw)
 
         self.canvas_widget.bind('<Enter>', lambda e: self.canvas_widget.config(
             cursor="hand2" if self.editable else "arrow"
@@ -274,76 +447,95 @@ class FanCurveWidget(tk.Frame):
         self.canvas_widget.bind('<Leave>', lambda e: self.canvas_widget.config(cursor="arrow"))
 
     def _on_mouse_press(self, event):
-        """选中控制点（不可编辑时不响应）"""
-        if not self.editable:
+        """
+        像素空间命中测试（不可编辑时不响应）
+        点中控制点：开始拖动全部选中点（点中未选中的点时先单独选中它）
+        点在空白处：开始框选；按住shift时在原选择上追加
+        """
+        if not self.editable or event.button != 1 or event.inaxes not in (self.ax_cpu, self.ax_gpu):
             return
 
-        self.dragging_curve = None
-        self.dragging_idx = None
-        self.has_dragging_change = False
-
-        if not event.inaxes or event.xdata is None or event.ydata is None:
-            return
+        self._press_curve = 'cpu' if event.inaxes is self.ax_cpu else 'gpu'
+        self._press_xy = (event.x, event.y)
+        extend = event.key == 'shift'
+
+        hit = hit_test(self._points_px(), event.x, event.y, self.detect_radius, self._selectable)
+        if hit is not None:
+            if not self.selected[hit]:
+                if not extend:
+                    self.selected[:] = False
+                self.selected[hit] = True
+            self._gesture = 'drag'
+            self._origin = np.array([self._cpu_speed, self._gpu_speed])
+        else:
+            self._base_selection = self.selected.copy() if extend else np.zeros_like(self.selected)
+            self.selected = self._base_selection.copy()
+            self._gesture = 'box'
 
-        # 温度点匹配（支持100℃区域点击90℃点）
-        temp = round(event.xdata)
-        temp = np.clip(temp, 0, 90)  # 限制在0-90（有效数据点范围）
-        closest_idx = min(range(len(self.fixed_temps)),
-                          key=lambda i: abs(self.fixed_temps[i] - temp))
-        closest_temp = self.fixed_temps[closest_idx]
+        self._sync_selection()
+        for curve in self.curves:
+            self._blit_curve(curve)
 
-        if closest_temp < 0 or closest_temp > 90 or closest_idx == 0:
+    def _on_mouse_move(self, event):
+        """拖动/框选（不可编辑时不响应）；只记录最新位置，渲染合并到下一帧"""
+        if not self.editable or self._gesture is None:
             return
 
-        # 判断子图
-        if event.inaxes == self.ax_cpu:
-            cpu_x, cpu_y = self.fixed_temps[closest_idx], self._cpu_speed[closest_idx]
-            cpu_dist = np.hypot(event.xdata - cpu_x, event.ydata - cpu_y)
-            if cpu_dist < self.detect_radius:
-                self.dragging_curve = 'cpu'
-                self.dragging_idx = closest_idx
-        elif event.inaxes == self.ax_gpu:
-            gpu_x, gpu_y = self.fixed_temps[closest_idx], self._gpu_speed[closest_idx]
-            gpu_dist = np.hypot(event.xdata - gpu_x, event.ydata - gpu_y)
-            if gpu_dist < self.detect_radius:
-                self.dragging_curve = 'gpu'
-                self.dragging_idx = closest_idx
+        self._pending_xy = (event.x, event.y)
+        if self._frame_job is None:
+            self._frame_job = self.after(self.frame_interval, self._render_gesture)
 
-    def _on_mouse_move(self, event):
-        """拖拽控制点（不可编辑时不响应）"""
-        if not self.editable:
+    def _render_gesture(self):
+        """按帧应用最新的鼠标位置，只blit有变化的子图"""
+        self._frame_job = None
+        xy, self._pending_xy = self._pending_xy, None
+        if xy is None or self._gesture is None:
             return
 
-        if self.dragging_curve and self.dragging_idx is not None:
-            if not event.inaxes or event.ydata is None:
-                return
-
-            new_y = int(round(event.ydata))
-            new_y = max(0, min(new_y, 100))
-
-            # 确保索引有效
-            if 0 <= self.dragging_idx < len(self._cpu_speed):
-                if self.dragging_curve == 'cpu' and self._cpu_speed[self.dragging_idx] != new_y:
-                    self._cpu_speed[self.dragging_idx] = new_y
-                    self.has_dragging_change = True
-                    self.update_plot_data()
-            if 0 <= self.dragging_idx < len(self._gpu_speed):
-                if self.dragging_curve == 'gpu' and self._gpu_speed[self.dragging_idx] != new_y:
-                    self._gpu_speed[self.dragging_idx] = new_y
-                    self.has_dragging_change = True
-                    self.update_plot_data()
+        ax = self._curve_artists(self._press_curve)[0]
+        to_data = ax.transData.inverted()
+        if self._gesture == 'drag':
+            # 选中点整体平移（保持相对形状，限制在0-100）
+            delta = to_data.transform(xy)[1] - to_data.transform(self._press_xy)[1]
+            speeds = shift_points(self._origin, self.selected, delta)
+            for i, curve in enumerate(self.curves):
+                values = speeds[i].tolist()
+                if values == self._speeds(curve):
+                    continue
+                self._set_speeds(curve, values)
+                self._sync_selection()
+                self._blit_curve(curve)
+        else:
+            # 框选只作用于按下时所在的子图
+            inside = points_in_box(self._points_px(), *self._press_xy, *xy) & self._selectable
+            inside[[curve != self._press_curve for curve in self.curves]] = False
+            self.selected = self._base_selection | inside
+            (x0, y0), (x1, y1) = to_data.transform([self._press_xy, xy])
+            box = self._box[self._press_curve]
+            box.set_bounds(min(x0, x1), min(y0, y1), abs(x1 - x0), abs(y1 - y0))
+            box.set_visible(True)
+            self._sync_selection()
+            for curve in self.curves:
+                self._blit_curve(curve)
 
     def _on_mouse_release(self, event):
-        """释放鼠标（不可编辑时不响应）"""
-        if not self.editable:
+        """结束拖动/框选；一次拖动只触发一次数据回调（不可编辑时不响应）"""
+        if not self.editable or self._gesture is None:
             return
 
-        if self.has_dragging_change:
-            self._trigger_data_change()
+        # 渲染尚未处理的最后一次移动
+        if self._frame_job is not None:
+            self.after_cancel(self._frame_job)
+            self._render_gesture()
 
-        self.dragging_curve = None
-        self.dragging_idx = None
-        self.has_dragging_change = False
+        gesture, self._gesture = self._gesture, None
+        if gesture == 'box':
+            self._box[self._press_curve].set_visible(False)
+            self._blit_curve(self._press_curve)
+        elif (np.array([self._cpu_speed, self._gpu_speed]) != self._origin).any():
+            self._trigger_data_change()
+        self._origin = None
+        self._base_selection = None
 
 
 # ------------------- 测试代码 -------------------
@@ -449,7 +641,7 @@ if __name__ == "__main__":
     ttk.Button(btn_frame, text="启用编辑（恢复彩色）", command=enable_editing).pack(side=tk.LEFT, padx=4, pady=4)
 
     # 提示标签
-    tip_label = ttk.Label(root, text="💡 已添加100℃刻度，90℃右侧可轻松拖拽 | 禁用编辑时图表自动置灰", font=("SimHei", 9),
+    tip_label = ttk.Label(root, text="💡 拖动控制点编辑曲线 | 空白处拖动框选多个点后整体拖动（shift追加选择） | 禁用编辑时图表自动置灰", font=("SimHei", 9),
                           foreground="blue")
     tip_label.pack(pady=5)
 
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+import zipfile
+from datetime import datetime
+
+from LogUtils import ordered_log_segments
+from TelemetryUtils import list_telemetry_files
+
+CHUNK_SIZE = 1024 * 1024  # 逐块复制的块大小
+
+
+class BundleCancelled(Exception):
+    """诊断包导出被取消"""
+
+
+class DiagnosticsBundle:
+    """
+    诊断包导出：日志分段、配置文件、近期二进制遥测和运行时诊断信息写入单个zip
+    文件逐块复制（内存占用与文件大小无关），在后台线程执行；界面线程轮询进度属性
+    :param out_path: 输出zip路径
+    :param log_dir: 日志目录（包含全部分段）
+    :param config_files: 需要附带的配置文件路径
+    :param telemetry_dir: 遥测目录
+    :param telemetry_days: 附带最近多少天内修改过的遥测分段
+    :param diagnostics: 附加的诊断信息（可JSON序列化的字典，如硬件调用耗时）
+    """
+
+    def __init__(self, out_path, log_dir, config_files=(), telemetry_dir=None, telemetry_days=3, diagnostics=None):
+        self.out_path = out_path
+        self.log_dir = log_dir
+        self.config_files = list(config_files)
+        self.telemetry_dir = telemetry_dir
+        self.telemetry_days = telemetry_days
+        self.diagnostics = diagnostics or {}
+        self.total_bytes = 0
+        self.done_bytes = 0
+        self.current = ""  # 正在写入的文件
+        self.skipped = []  # 导出过程中消失或无法读取的文件
+        self.error = None
+        self.done = False
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    def collect(self):
+        """
+        列出要打包的文件：[(源路径, 包内路径, 字节数)]
+        字节数在此刻确定，正在写入的日志只复制到这个位置
+        """
+        entries = []
+        for path in ordered_log_segments(self.log_dir):
+            entries.append((path, f"logs/{os.path.basename(path)}"))
+        for path in self.config_files:
+            if os.path.exists(path):
+                entries.append((path, f"config/{os.path.basename(path)}"))
+        if self.telemetry_dir:
+            since = time.time() - self.telemetry_days * 24 * 3600
+            for path in list_telemetry_files(self.telemetry_dir):
+                if os.path.getmtime(path) >= since:
+                    entries.append((path, f"telemetry/{os.path.basename(path)}"))
+
+        result = []
+        for path, arcname in entries:
+            try:
+                result.append((path, arcname, os.path.getsize(path)))
+            except OSError:
+                self.skipped.append(path)
+        return result
+
+    def start(self):
+        """启动后台导出线程"""
+        self._thread = threading.Thread(target=self.run, name="DiagnosticsBundle", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def progress(self):
+        """导出进度（0~1）"""
+        return self.done_bytes / self.total_bytes if self.total_bytes else 0.0
+
+    def run(self):
+        try:
+            entries = self.collect()
+            self.total_bytes = sum(size for _, _, size in entries)
+            with zipfile.ZipFile(self.out_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                for path, arcname, size in entries:
+                    self.current = arcname
+                    try:
+                        self._copy(zf, path, arcname, size)
+                    except (FileNotFoundError, PermissionError):
+                        # 导出期间被切分/压缩的分段，跳过并记录
+                        self.skipped.append(path)
+                        self.done_bytes += size
+                self.current = "diagnostics.json"
+                manifest = dict(self.diagnostics)
+                manifest["exported_at"] = datetime.now().isoformat(timespec="seconds")
+                manifest["files"] = [arcname for _, arcname, _ in entries]
+                manifest["skipped"] = self.skipped
+                zf.writestr("diagnostics.json", json.dumps(manifest, ensure_ascii=False, indent=2, default=str))
+        except BundleCancelled:
+            self._remove_output()
+        except Exception as e:
+            self.error = e
+            self._remove_output()
+        finally:
+            self.done = True
+
+    def _copy(self, zf, path, arcname, size):
+        """逐块复制单个文件（最多 size 字节）；已压缩的 .gz 分段直接存储不再压缩"""
+        info = zipfile.ZipInfo.from_file(path, arcname)
+        info.compress_type = zipfile.ZIP_STORED if path.endswith(".gz") else zipfile.ZIP_DEFLATED
+        with open(path, "rb") as src, zf.open(info, "w") as dst:
+            remaining = size
+            while remaining > 0:
+                if self._cancelled.is_set():
+                    raise BundleCancelled()
+                chunk = src.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                dst.write(chunk)
+                remaining -= len(chunk)
+                self.done_bytes += len(chunk)
+            self.done_bytes += remaining  # 文件在导出期间变短时补齐进度
+
+    def _remove_output(self):
+        try:
+            os.remove(self.out_path)
+        except OSError:
+            pass
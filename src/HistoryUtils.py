@@ -0,0 +1,205 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+METRICS = ("cpu_temp", "gpu_temp", "cpu_rpm", "gpu_rpm")
+
+# 分级存储：(表名, 聚合粒度秒数, 保留秒数)；粒度为1的是原始采样
+TIERS = (
+    ("raw_1s", 1, 24 * 3600),  # 原始1秒采样，保留1天
+    ("agg_10s", 10, 31 * 24 * 3600),  # 10秒聚合，保留1个月
+    ("agg_60s", 60, 366 * 24 * 3600),  # 1分钟聚合，保留1年
+)
+
+
+def _aggregate_columns():
+    columns = []
+    for metric in METRICS:
+        columns += [f"{metric}_min", f"{metric}_mean", f"{metric}_max"]
+    return columns
+
+
+AGG_COLUMNS = _aggregate_columns()
+
+
+class _Bucket:
+    """单个聚合桶的增量统计（最小/累加/最大）"""
+
+    __slots__ = ("start", "n", "sums", "mins", "maxs")
+
+    def __init__(self, start, values):
+        self.start = start
+        self.n = 1
+        self.sums = list(values)
+        self.mins = list(values)
+        self.maxs = list(values)
+
+    def add(self, values):
+        self.n += 1
+        for i, v in enumerate(values):
+            self.sums[i] += v
+            if v < self.mins[i]:
+                self.mins[i] = v
+            if v > self.maxs[i]:
+                self.maxs[i] = v
+
+    def row(self):
+        row = [self.start, self.n]
+        for i in range(len(METRICS)):
+            row += [self.mins[i], self.sums[i] / self.n, self.maxs[i]]
+        return row
+
+
+class HistoryStore:
+    """
+    长期温度历史存储（SQLite分级降采样）
+    监控线程只做非阻塞入队，后台线程负责增量聚合、批量提交和过期清理
+    :param db_path: 数据库文件路径
+    :param commit_interval: 批量提交间隔（秒）
+    :param prune_interval: 过期数据清理间隔（秒）
+    """
+
+    def __init__(self, db_path, commit_interval=30, prune_interval=600):
+        self.db_path = db_path
+        self.commit_interval = commit_interval
+        self.prune_interval = prune_interval
+        self.dropped = 0  # 队列满时丢弃的采样数
+        self._queue = queue.Queue(maxsize=3600)
+        self._buckets = {}  # 表名 -> 当前未完成的聚合桶
+        self._thread = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            self._create_tables(conn)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")  # 写入时不阻塞查询
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _create_tables(conn):
+        raw_table = TIERS[0][0]
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {raw_table} "
+                     f"(ts INTEGER PRIMARY KEY, {', '.join(f'{m} REAL' for m in METRICS)})")
+        for table, _, _ in TIERS[1:]:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                         f"(ts INTEGER PRIMARY KEY, n INTEGER, {', '.join(f'{c} REAL' for c in AGG_COLUMNS)})")
+        conn.commit()
+
+    def start(self):
+        """启动后台写入线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="HistoryStore", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """停止后台线程（写出未完成的聚合桶）"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def add(self, cpu_temp, gpu_temp, cpu_rpm, gpu_rpm, timestamp=None):
+        """提交一条采样（非阻塞，队列满时丢弃并计数）"""
+        ts = int(time.time() if timestamp is None else timestamp)
+        try:
+            self._queue.put_nowait((ts, (float(cpu_temp), float(gpu_temp), float(cpu_rpm), float(gpu_rpm))))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        conn = self._connect()
+        pending = {table: [] for table, _, _ in TIERS}
+        last_commit = last_prune = time.monotonic()
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.commit_interval)
+                except queue.Empty:
+                    item = ()
+                if item is None:
+                    # 退出前把未完成的聚合桶也写入
+                    for table, _, _ in TIERS[1:]:
+                        bucket = self._buckets.pop(table, None)
+                        if bucket:
+                            pending[table].append(bucket.row())
+                    self._commit(conn, pending)
+                    break
+                if item:
+                    self._ingest(item, pending)
+
+                now = time.monotonic()
+                if now - last_commit >= self.commit_interval:
+                    self._commit(conn, pending)
+                    last_commit = now
+                if now - last_prune >= self.prune_interval:
+                    self.prune(conn)
+                    last_prune = now
+        finally:
+            conn.close()
+
+    def _ingest(self, item, pending):
+        """增量降采样：采样落入新的时间桶时，把上一个桶写出"""
+        ts, values = item
+        pending[TIERS[0][0]].append((ts,) + values)
+        for table, step, _ in TIERS[1:]:
+            start = ts - ts % step
+            bucket = self._buckets.get(table)
+            if bucket is None or bucket.start != start:
+                if bucket is not None:
+                    pending[table].append(bucket.row())
+                self._buckets[table] = _Bucket(start, values)
+            else:
+                bucket.add(values)
+
+    @staticmethod
+    def _commit(conn, pending):
+        raw_table = TIERS[0][0]
+        with conn:
+            if pending[raw_table]:
+                conn.executemany(f"INSERT OR REPLACE INTO {raw_table} VALUES (?, ?, ?, ?, ?)", pending[raw_table])
+            placeholders = ", ".join("?" * (len(AGG_COLUMNS) + 2))
+            for table, _, _ in TIERS[1:]:
+                if pending[table]:
+                    conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", pending[table])
+        for rows in pending.values():
+            rows.clear()
+
+    @staticmethod
+    def prune(conn, now=None):
+        """按各级保留时长删除过期数据（主键即时间戳，删除走索引）"""
+        now = int(time.time() if now is None else now)
+        with conn:
+            for table, _, retention in TIERS:
+                conn.execute(f"DELETE FROM {table} WHERE ts < ?", (now - retention,))
+
+    @staticmethod
+    def pick_tier(start, end, max_points=2000, now=None):
+        """根据查询跨度和数据保留时长选择合适的分级（点数不超过max_points）"""
+        now = time.time() if now is None else now
+        for table, step, retention in TIERS:
+            if start >= now - retention and (end - start) / step <= max_points:
+                return table
+        return TIERS[-1][0]
+
+    def query(self, start, end, table=None, max_points=2000):
+        """
+        查询时间范围内的历史数据
+        :return: (列名列表, 行列表)；原始采样表为各指标值，聚合表为 n 与各指标的 min/mean/max
+        """
+        table = table or self.pick_tier(start, end, max_points)
+        conn = self._connect()
+        try:
+            cursor = conn.execute(f"SELECT * FROM {table} WHERE ts BETWEEN ? AND ? ORDER BY ts",
+                                  (int(start), int(end)))
+            columns = [d[0] for d in cursor.description]
+            return columns, cursor.fetchall()
+        finally:
+            conn.close()
@@ -0,0 +1,457 @@
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+
+# 灯光区域（与原灯光设置面板一致：键盘 0，氛围灯 1）
+KEYBOARD_REGION = 0
+LED_REGION = 1
+
+# MCUControl.LightSwitch 的命令和亮度参数
+LIGHT_COMMANDS = {
+    "关闭": 0,
+    "打开": 1,
+    "常亮": 2,
+    "呼吸": 3,
+    "渐变": 4
+}
+LIGHT_LEVELS = {
+    "亮度0": 0,
+    "亮度1": int(255 / 4),
+    "亮度2": int(255 / 3),
+    "亮度3": int(255 / 2),
+    "亮度4": int(255 / 1),
+}
+
+LUT_SIZE = 256  # 渐变预计算的采样数
+TEMP_RESOLUTION = 0.1  # 温度查找表分辨率（℃）
+
+# 温度联动灯光默认配置（fan_config.json 的 TempLight 项）
+DEFAULT_TEMP_LIGHT = {
+    "Enabled": False,
+    "Stops": [[40, "#00c800"], [60, "#ffff00"], [75, "#ffa523"], [90, "#ff0000"]],  # [温度, 颜色]
+    "KeyboardSource": "cpu",  # 键盘跟随的温度：cpu/gpu/max
+    "LedSource": "gpu",  # 氛围灯跟随的温度
+    "MinInterval": 1.0,  # 同一区域两次写入的最小间隔（秒）
+}
+
+
+def parse_color(color):
+    """颜色统一为 (R, G, B)：支持 "#RRGGBB" 和三元组"""
+    if isinstance(color, str):
+        color = color.lstrip("#")
+        return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+    return tuple(int(c) for c in color)
+
+
+def gradient_lut(stops, size=LUT_SIZE):
+    """
+    多段渐变预计算为颜色表
+    :param stops: [(位置0~1, 颜色), ...]；也可以只给颜色列表（均匀分布）
+    :return: 形状 (size, 3) 的 float 数组
+    """
+    if not all(isinstance(stop, tuple) and len(stop) == 2 for stop in stops):
+        stops = [(i / max(1, len(stops) - 1), color) for i, color in enumerate(stops)]
+    positions = np.array([position for position, _ in stops], dtype=float)
+    colors = np.array([parse_color(color) for _, color in stops], dtype=float)
+    x = np.linspace(0, 1, size)
+    return np.column_stack([np.interp(x, positions, colors[:, channel]) for channel in range(3)])
+
+
+class Solid:
+    """固定颜色"""
+
+    def __init__(self, color):
+        self.color = parse_color(color)
+
+    def color_at(self, t):
+        return self.color
+
+
+class Gradient:
+    """
+    多段渐变：period 秒走完一遍后从头开始
+    :param bounce: True 时往返播放（首尾颜色不同也不会跳变）
+    """
+
+    def __init__(self, stops, period=4.0, bounce=False):
+        self.lut = gradient_lut(stops)
+        self.period = period
+        self.bounce = bounce
+
+    def color_at(self, t):
+        phase = (t % self.period) / self.period
+        if self.bounce:
+            phase = 1 - abs(2 * phase - 1)
+        return self.lut[min(int(phase * LUT_SIZE), LUT_SIZE - 1)]
+
+
+class Pulse:
+    """单色脉冲：亮度在 low~1 之间按余弦起伏"""
+
+    def __init__(self, color, period=2.0, low=0.1):
+        self.color = np.array(parse_color(color), dtype=float)
+        self.period = period
+        self.low = low
+
+    def color_at(self, t):
+        level = self.low + (1 - self.low) * (0.5 - 0.5 * math.cos(2 * math.pi * t / self.period))
+        return self.color * level
+
+
+class Sequence:
+    """
+    依次播放若干效果（或颜色），播完后循环
+    :param steps: [(效果或颜色, 持续秒数), ...]
+    """
+
+    def __init__(self, steps):
+        self.steps = [(as_effect(effect), duration) for effect, duration in steps]
+        self.total = sum(duration for _, duration in self.steps)
+
+    def color_at(self, t):
+        t %= self.total
+        for effect, duration in self.steps:
+            if t < duration:
+                return effect.color_at(t)
+            t -= duration
+        return self.steps[-1][0].color_at(0)
+
+
+def as_effect(effect):
+    """颜色直接作为固定颜色效果"""
+    return effect if hasattr(effect, "color_at") else Solid(effect)
+
+
+class LightingService:
+    """
+    灯光服务：所有 LightSwitch 写入的统一入口，缓存每个区域最近一次写入的状态
+    - 与缓存相同的设置不写入；区域已打开时切换模式/颜色/亮度不再重复发送“打开”
+    - 一次更新多个区域（键盘+氛围灯）时作为一个事务，在硬件锁内依次写入
+    :param mcu: MCUControl
+    :param hw_lock: 与风扇控制共用的硬件锁
+    :param latency: LatencyStats 实例（每次 LightSwitch 计入 "LightSwitch"）
+    """
+
+    def __init__(self, mcu, hw_lock, latency=None):
+        self.mcu = mcu
+        self.hw_lock = hw_lock
+        self.latency = latency
+        self.writes = 0
+        self.skipped = 0
+        self._state = {}  # 区域 -> (模式, (R, G, B), 亮度值)
+
+    def apply(self, updates):
+        """
+        获取硬件锁后写入（阻塞，用于用户操作和启动恢复）
+        :param updates: {区域: (模式, (R, G, B), 亮度名)}
+        :return: 实际写入次数
+        """
+        with self.hw_lock:
+            return self.apply_locked(updates)
+
+    def apply_locked(self, updates):
+        """调用方已持有硬件锁时使用（灯效引擎、温度联动）"""
+        count = 0
+        for region, (mode, rgb, light) in updates.items():
+            state = (mode, tuple(rgb), LIGHT_LEVELS[light])
+            previous = self._state.get(region)
+            if previous == state:
+                self.skipped += 1
+                continue
+            if mode != "关闭" and (previous is None or previous[0] == "关闭"):
+                self._send(region, "打开", state)
+                count += 1
+            self._send(region, mode, state)
+            count += 1
+            self._state[region] = state
+        self.writes += count
+        return count
+
+    def _send(self, region, mode, state):
+        r, g, b = state[1]
+        try:
+            if self.latency is None:
+                self.mcu.LightSwitch(region, LIGHT_COMMANDS[mode], r, g, b, state[2])
+            else:
+                with self.latency.measure("LightSwitch"):
+                    self.mcu.LightSwitch(region, LIGHT_COMMANDS[mode], r, g, b, state[2])
+        except Exception:
+            self._state.pop(region, None)  # 写入失败后状态未知，下次完整写入
+            raise
+
+    def invalidate(self, region=None):
+        """忘记缓存的状态（灯光可能被外部改变时调用），下次写入时完整发送"""
+        if region is None:
+            self._state.clear()
+        else:
+            self._state.pop(region, None)
+
+
+class TemperatureGradient:
+    """
+    温度渐变预编译为0.1℃分辨率的颜色查找表，查询只需一次下标计算
+    :param stops: [(温度, 颜色), ...]，超出两端时取端点颜色
+    :param quantize: 颜色量化步长，过滤不易察觉的细微变化以减少写入
+    """
+
+    def __init__(self, stops, low=0.0, high=110.0, quantize=8):
+        stops = sorted((float(temp), parse_color(color)) for temp, color in stops)
+        positions = np.array([temp for temp, _ in stops])
+        colors = np.array([color for _, color in stops], dtype=float)
+        self.low = low
+        temps = low + np.arange(int(round((high - low) / TEMP_RESOLUTION)) + 1) * TEMP_RESOLUTION
+        lut = np.column_stack([np.interp(temps, positions, colors[:, channel]) for channel in range(3)])
+        self.lut = np.clip(np.round(lut / quantize) * quantize, 0, 255).astype(np.uint8)
+
+    def color(self, temp):
+        index = int(round((temp - self.low) / TEMP_RESOLUTION))
+        index = max(0, min(index, len(self.lut) - 1))
+        return tuple(int(c) for c in self.lut[index])
+
+
+class TemperatureLighting:
+    """
+    温度联动灯光：由监控循环用已读取的温度驱动，不额外读取硬件
+    监控线程只通过 submit 交出温度，查表和 LightSwitch 写入在独立的工作线程中进行，不拖慢风扇控制
+    量化后的颜色变化且距该区域上次写入超过 min_interval 才写入；硬件锁被占用时跳过，等下一次监控
+    :param write: 写入函数 write(区域, (R, G, B))，在持有硬件锁时调用
+    :param sources: {区域: "cpu"/"gpu"/"max"}
+    """
+
+    def __init__(self, write, hw_lock, gradient, sources, min_interval=1.0):
+        self.write = write
+        self.hw_lock = hw_lock
+        self.gradient = gradient
+        self.sources = dict(sources)
+        self.min_interval = min_interval
+        self.writes = 0
+        self._last_color = {}
+        self._written_at = {}
+        self._pending = None  # 最近一次提交、尚未处理的温度（只保留最新一次）
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config, write, hw_lock):
+        """按 TempLight 配置创建"""
+        config = {**DEFAULT_TEMP_LIGHT, **(config or {})}
+        return cls(write, hw_lock, TemperatureGradient(config["Stops"]),
+                   {KEYBOARD_REGION: config["KeyboardSource"], LED_REGION: config["LedSource"]},
+                   config["MinInterval"])
+
+    def submit(self, temps):
+        """
+        交出本次监控读取的温度（监控线程调用，不等待写入）
+        stop() 之后调用不做任何事（监控线程可能仍持有已关闭的实例），工作线程只由 start() 启动
+        :param temps: {"cpu": 温度, "gpu": 温度}
+        """
+        if self._stopped.is_set():
+            return
+        with self._pending_lock:
+            self._pending = dict(temps)
+        self._wake.set()
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="TemperatureLighting", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            with self._pending_lock:
+                temps, self._pending = self._pending, None
+            if temps is None or self._stopped.is_set():
+                continue
+            try:
+                self.update(temps)
+            except Exception as e:
+                logging.warning(f"温度联动灯光更新失败：{str(e)}")
+
+    def update(self, temps, now=None):
+        """
+        按温度更新灯光颜色（在工作线程中执行）
+        :param temps: {"cpu": 温度, "gpu": 温度}
+        """
+        now = time.monotonic() if now is None else now
+        for region, source in self.sources.items():
+            temp = max(temps["cpu"], temps["gpu"]) if source == "max" else temps[source]
+            color = self.gradient.color(temp)
+            if color == self._last_color.get(region):
+                continue
+            if now - self._written_at.get(region, float("-inf")) < self.min_interval:
+                continue
+            if not self.hw_lock.acquire(blocking=False):
+                return
+            try:
+                if self._stopped.is_set():
+                    return  # 已关闭：持锁后再检查，不覆盖关闭时恢复的预设
+                self.write(region, color)
+                self._last_color[region] = color
+                self.writes += 1
+            except Exception as e:
+                logging.warning(f"温度联动灯光写入失败（区域{region}）：{str(e)}")
+            finally:
+                self.hw_lock.release()
+            self._written_at[region] = now
+
+    def reset(self):
+        """忘记已写入的颜色（区域被其他设置改写后调用，下次监控重新写入）"""
+        self._last_color.clear()
+
+
+class LightingEffectEngine:
+    """
+    软件灯效引擎：固定帧时钟计算各区域颜色，通过 LightSwitch 写入（区域：0-键盘，1-氛围灯）
+    - 颜色未变化的区域不写入；每帧最多写入 write_budget 次，最久未写的区域优先
+    - 硬件锁非阻塞获取：风扇控制正在写入时跳过本次写入，风扇写入最多等待一次正在进行的灯光写入
+    - LightSwitch 耗时升高时自动降低帧率，恢复后逐步回到目标帧率
+    :param write: 写入函数 write(区域, (R, G, B))，在持有硬件锁时调用
+    :param hw_lock: 与风扇控制共用的硬件锁
+    :param latency: LatencyStats 实例（None 时不自适应）
+    :param fps: 目标帧率
+    :param load_limit: 写入耗时占帧间隔的上限比例，超过时降帧
+    """
+
+    def __init__(self, write, hw_lock, latency=None, fps=20, min_fps=2, write_budget=2, load_limit=0.5):
+        self.write = write
+        self.hw_lock = hw_lock
+        self.latency = latency
+        self.target_fps = fps
+        self.fps = fps
+        self.min_fps = min_fps
+        self.write_budget = write_budget
+        self.load_limit = load_limit
+        self.stats = {"frames": 0, "writes": 0, "unchanged": 0, "busy": 0, "dropped": 0, "errors": 0}
+
+        self._effects = {}  # 区域 -> (效果, 开始时间)
+        self._last_color = {}  # 区域 -> 最近写入的颜色
+        self._written_at = {}  # 区域 -> 最近写入时间
+        self._effects_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._next_adapt = 0.0
+
+    def set_effect(self, region, effect):
+        """为区域设置效果（效果对象或颜色），引擎未运行时自动启动"""
+        with self._effects_lock:
+            self._effects[region] = (as_effect(effect), time.monotonic())
+        self._wake.set()
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+
+    def clear(self, region=None):
+        """停止区域的软件效果（None 表示全部），之后可重新使用固件预设"""
+        with self._effects_lock:
+            regions = list(self._effects) if region is None else [region]
+            for r in regions:
+                self._effects.pop(r, None)
+                self._last_color.pop(r, None)
+
+    def has_effect(self, region):
+        return region in self._effects
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="LightingEffectEngine", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def _run(self):
+        next_frame = time.monotonic()
+        while not self._stopped.is_set():
+            if not self._effects:
+                # 没有效果时休眠，不占用CPU
+                self._wake.wait()
+                self._wake.clear()
+                next_frame = time.monotonic()
+                continue
+
+            now = time.monotonic()
+            if now < next_frame:
+                self._stopped.wait(next_frame - now)
+                continue
+
+            # 落后超过一帧时丢弃错过的帧，不追赶
+            missed = int((now - next_frame) * self.fps)
+            self.stats["dropped"] += missed
+            self.render_frame(now)
+            self._adapt(now)
+            next_frame += (missed + 1) / self.fps
+
+    def render_frame(self, now):
+        """计算并写入一帧"""
+        self.stats["frames"] += 1
+        with self._effects_lock:
+            items = list(self._effects.items())
+
+        pending = []
+        for region, (effect, start) in items:
+            color = tuple(int(round(max(0, min(255, c)))) for c in effect.color_at(now - start))
+            if self._last_color.get(region) == color:
+                self.stats["unchanged"] += 1
+            else:
+                pending.append((region, color))
+
+        # 超出预算的区域留到下一帧（届时按新的时间重新计算颜色）
+        pending.sort(key=lambda item: self._written_at.get(item[0], 0.0))
+        for region, color in pending[:self.write_budget]:
+            if not self.hw_lock.acquire(blocking=False):
+                self.stats["busy"] += 1
+                break
+            try:
+                if not self.has_effect(region):  # 等待期间已被清除
+                    continue
+                self.write(region, color)
+                self._last_color[region] = color
+                self.stats["writes"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.warning(f"灯效写入失败（区域{region}）：{str(e)}")
+            finally:
+                self.hw_lock.release()
+            self._written_at[region] = now
+
+    def _adapt(self, now):
+        """每秒按最近的 LightSwitch 耗时调整一次帧率"""
+        if self.latency is None or now < self._next_adapt:
+            return
+        self._next_adapt = now + 1.0
+        mean = self.latency.recent("LightSwitch", n=10)
+        if mean is None:
+            return
+        load = mean * self.write_budget * self.fps
+        if load > self.load_limit and self.fps > self.min_fps:
+            self.fps = max(self.min_fps, self.fps / 2)
+            logging.info(f"灯光写入耗时{mean * 1000:.1f}ms，灯效帧率降至{self.fps:g}")
+        elif load < self.load_limit / 4 and self.fps < self.target_fps:
+            self.fps = min(self.target_fps, self.fps + 1)
+
+
+# ------------------- 测试代码 -------------------
+if __name__ == "__main__":
+    # 不连接硬件：写入函数只打印颜色
+    def print_write(region, rgb):
+        time.sleep(0.005)  # 模拟一次 LightSwitch 调用
+        print(f"{time.monotonic():.2f} 区域{region} -> #{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}")
+
+    engine = LightingEffectEngine(print_write, threading.Lock(), fps=10)
+    engine.set_effect(KEYBOARD_REGION, Gradient(["#ff0000", "#00ff00", "#0000ff"], period=3, bounce=True))
+    engine.set_effect(LED_REGION, Sequence([("#ffffff", 0.5), (Pulse("#ff8800", period=1), 2)]))
+    time.sleep(3)
+    engine.stop()
+    print(engine.stats)
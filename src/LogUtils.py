@@ -0,0 +1,512 @@
+import gzip
+import heapq
+import itertools
+import logging
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+from datetime import date, datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# 可以延迟格式化的参数类型（不可变，入队后不会被修改）
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, type(None))
+
+# 模式切换日志：记录时传 extra=MODE_CHANGE，写盘时行尾追加 MODE_CHANGE_TAG，日志查看器据此筛选
+MODE_CHANGE = {"mode_change": True}
+MODE_CHANGE_TAG = "[模式切换]"
+
+
+class DropQueueHandler(QueueHandler):
+    """
+    非阻塞日志入队处理器（有界队列，队列满时丢弃并计数）
+    监控线程只负责入队，格式化和写盘都由后台监听线程完成
+    :param maxsize: 队列最大长度
+    """
+
+    def __init__(self, maxsize=10000):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.dropped = 0  # 累计丢弃条数
+        self.listener = None  # 关联的后台监听器
+
+    def prepare(self, record):
+        """入队前处理：参数均为不可变类型时保留原始msg/args，延迟到写盘时再格式化"""
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(a, _IMMUTABLE_ARG_TYPES) for a in args)):
+            # 可变参数可能在入队后被修改，只能立即格式化
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        """非阻塞入队，队列满时直接丢弃"""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DropReportingListener(QueueListener):
+    """
+    后台日志监听器：从队列取出记录写入文件，并补写丢弃统计
+    :param queue_handler: 对应的 DropQueueHandler
+    :param handlers: 实际写盘的处理器
+    """
+
+    def __init__(self, queue_handler, *handlers):
+        super().__init__(queue_handler.queue, *handlers, respect_handler_level=True)
+        self.queue_handler = queue_handler
+        self._reported = 0  # 已报告的丢弃条数
+        self._stop_lock = threading.Lock()
+
+    def handle(self, record):
+        """写盘前检查是否有新的丢弃记录，有则先补写一条警告"""
+        dropped = self.queue_handler.dropped
+        if dropped != self._reported:
+            lost = dropped - self._reported
+            self._reported = dropped
+            super().handle(logging.makeLogRecord({
+                "name": record.name,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"日志队列已满，丢弃{lost}条日志（累计{dropped}条）",
+            }))
+        super().handle(record)
+
+    def enqueue_sentinel(self):
+        """停止标记必须入队成功（监听线程仍在消费，阻塞等待即可）"""
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        """停止监听线程（可重复调用）"""
+        with self._stop_lock:
+            if self._thread is not None:
+                super().stop()
+
+
+def get_log_file(logger):
+    """获取当前写入的日志文件路径（兼容直接挂载和经由队列转发的文件处理器）"""
+    handlers = list(logger.handlers)
+    for handler in logger.handlers:
+        listener = getattr(handler, "listener", None)
+        if listener is not None:
+            handlers.extend(listener.handlers)
+
+    for handler in handlers:
+        if isinstance(handler, logging.FileHandler):
+            return handler.baseFilename
+    return None
+
+
+class TaggedFormatter(logging.Formatter):
+    """日志格式化器：带模式切换标记（extra=MODE_CHANGE）的记录在行尾追加 MODE_CHANGE_TAG"""
+
+    def format(self, record):
+        text = super().format(record)
+        if getattr(record, "mode_change", False):
+            text = f"{text} {MODE_CHANGE_TAG}"
+        return text
+
+
+class MonitorLogPolicy:
+    """
+    监控日志记录策略：状态变化立即记录、数值突变立即记录、其余按采样间隔记录
+    被跳过的行会计数，下一条记录时附带省略条数，避免看起来像丢日志
+    :param sample_interval: 常规状态每隔多少次监控记录一次（1表示每次都记录）
+    :param temp_delta: 温度变化超过该值（℃）时立即记录
+    :param rpm_delta: 转速变化超过该值（转）时立即记录
+    """
+
+    def __init__(self, sample_interval=60, temp_delta=3.0, rpm_delta=500):
+        self.sample_interval = max(1, int(sample_interval))
+        self.temp_delta = temp_delta
+        self.rpm_delta = rpm_delta
+        self.suppressed = 0  # 距上次记录省略的条数
+        self.total_suppressed = 0  # 累计省略条数
+        self._last_values = None  # 上次记录时的 (CPU温度, GPU温度, CPU转速, GPU转速)
+        self._last_state = None  # 上次记录时的状态（风扇模式、性能模式等）
+        self._ticks = 0  # 距上次记录的监控次数
+
+    def check(self, values, state, transition=False):
+        """
+        判断本次监控是否需要记录
+        :param values: (CPU温度, GPU温度, CPU转速, GPU转速)
+        :param state: 可比较的状态元组，变化即视为状态切换
+        :param transition: 调用方已知发生了状态切换（如阈值触发的模式切换）
+        :return: 记录原因；返回None表示本次省略
+        """
+        self._ticks += 1
+        if transition or state != self._last_state:
+            reason = "状态变化"
+        elif self._last_values is None or self._changed(values):
+            reason = "数值变化"
+        elif self._ticks >= self.sample_interval:
+            reason = "定时采样"
+        else:
+            self.suppressed += 1
+            self.total_suppressed += 1
+            return None
+
+        self._last_values = values
+        self._last_state = state
+        self._ticks = 0
+        return reason
+
+    def _changed(self, values):
+        last = self._last_values
+        return (abs(values[0] - last[0]) >= self.temp_delta or abs(values[1] - last[1]) >= self.temp_delta or
+                abs(values[2] - last[2]) >= self.rpm_delta or abs(values[3] - last[3]) >= self.rpm_delta)
+
+    def take_suppressed(self):
+        """取出并清零距上次记录省略的条数"""
+        count, self.suppressed = self.suppressed, 0
+        return count
+
+
+LOG_PREFIX = "fan_control_log_"
+# 日志分段文件名：fan_control_log_YYYYMMDD.txt[.N][.gz]
+SEGMENT_PATTERN = re.compile(r"^" + LOG_PREFIX + r"(\d{8})\.txt(?:\.(\d+))?(\.gz)?$")
+
+
+def log_file_for_day(directory, day=None):
+    """某天的日志文件路径（默认今天）"""
+    day = day or datetime.now().strftime("%Y%m%d")
+    return os.path.join(directory, f"{LOG_PREFIX}{day}.txt")
+
+
+class DailyRotatingFileHandler(RotatingFileHandler):
+    """
+    按天+按大小切分的日志处理器
+    跨天时切换到新一天的文件；单文件超过大小时当前文件改名为 .1，已有备份（含.gz）依次后移
+    压缩和清理由 LogRetentionManager 在后台完成
+    :param directory: 日志目录
+    :param on_rollover: 切分后的回调（用于唤醒后台压缩）
+    """
+
+    def __init__(self, directory, maxBytes=1024 * 1024, backupCount=50, encoding='utf-8', on_rollover=None):
+        self.directory = directory
+        self.day = datetime.now().strftime("%Y%m%d")
+        self.on_rollover = on_rollover
+        super().__init__(log_file_for_day(directory, self.day), maxBytes=maxBytes,
+                         backupCount=backupCount, encoding=encoding)
+
+    def shouldRollover(self, record):
+        if datetime.now().strftime("%Y%m%d") != self.day:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        today = datetime.now().strftime("%Y%m%d")
+        if today != self.day:
+            # 跨天：直接切换到新一天的文件，旧文件留给后台压缩
+            self.day = today
+            self.baseFilename = log_file_for_day(self.directory, today)
+        else:
+            # 按大小切分：备份依次后移（未压缩和已压缩的都要处理）
+            for i in range(self.backupCount - 1, 0, -1):
+                for ext in ("", ".gz"):
+                    src = f"{self.baseFilename}.{i}{ext}"
+                    if os.path.exists(src):
+                        os.replace(src, f"{self.baseFilename}.{i + 1}{ext}")
+            if os.path.exists(self.baseFilename):
+                os.replace(self.baseFilename, self.baseFilename + ".1")
+
+        if not self.delay:
+            self.stream = self._open()
+        if self.on_rollover:
+            self.on_rollover()
+
+
+def list_log_segments(directory):
+    """列出目录下全部日志分段（当前文件、切分备份、压缩备份）"""
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if SEGMENT_PATTERN.match(name)]
+
+
+def segment_sort_key(path):
+    """分段时间顺序：按日期，同一天内备份序号越大越旧，当前文件最新"""
+    match = SEGMENT_PATTERN.match(os.path.basename(path))
+    if not match:
+        return "", 0
+    return match.group(1), -int(match.group(2) or 0)
+
+
+def ordered_log_segments(directory):
+    """按时间从旧到新列出全部日志分段"""
+    return sorted(list_log_segments(directory), key=segment_sort_key)
+
+
+def open_log_segment(path):
+    """以文本方式打开日志分段（自动识别.gz压缩）"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+# 日志行开头的 HH:MM:SS 时间
+LINE_TIME = re.compile(r"^(\d{2}):(\d{2}):(\d{2})")
+
+
+def timeline_key(moment):
+    """datetime 转换为时间线排序键（自公元元年起的秒数，与 iter_segment_lines 一致）"""
+    return moment.toordinal() * 86400 + moment.hour * 3600 + moment.minute * 60 + moment.second
+
+
+def iter_segment_lines(path):
+    """
+    流式读取单个分段，产出 (时间线排序键, 行)
+    日期取自文件名；没有时间前缀的续行沿用上一行时间；时间倒退超过12小时视为跨过午夜
+    """
+    match = SEGMENT_PATTERN.match(os.path.basename(path))
+    day = datetime.strptime(match.group(1), "%Y%m%d").toordinal() * 86400 if match else 0
+    last = prev_seconds = None
+    with open_log_segment(path) as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            time_match = LINE_TIME.match(line)
+            if time_match:
+                h, m, sec = (int(v) for v in time_match.groups())
+                seconds = h * 3600 + m * 60 + sec
+                if prev_seconds is not None and seconds < prev_seconds - 12 * 3600:
+                    day += 86400
+                prev_seconds = seconds
+                last = day + seconds
+            yield (day if last is None else last), line
+
+
+def iter_log_timeline(directory, start=None, end=None):
+    """
+    将目录下全部日志分段（每日文件、切分备份、压缩备份）合并为按时间排序的行流
+    同一天的分段用堆归并（逐行读取，不整体加载）；不同日期的分段依次衔接
+    :param start: 起始时间（datetime），早于该日期的分段不会被打开
+    :param end: 结束时间（datetime），晚于该日期的分段不会被打开
+    :return: (时间线排序键, 行) 迭代器
+    """
+    start_key = None if start is None else timeline_key(start)
+    end_key = None if end is None else timeline_key(end)
+    segments = ordered_log_segments(directory)
+    for day, paths in itertools.groupby(segments, key=lambda p: segment_sort_key(p)[0]):
+        day_key = datetime.strptime(day, "%Y%m%d").toordinal() * 86400
+        if (start_key is not None and day_key + 86400 <= start_key) or \
+                (end_key is not None and day_key > end_key):
+            continue
+        # 同一时间的行按分段顺序输出（heapq.merge 对相等键保持输入顺序）
+        for key, line in heapq.merge(*(iter_segment_lines(p) for p in paths), key=lambda item: item[0]):
+            if start_key is not None and key < start_key:
+                continue
+            if end_key is not None and key > end_key:
+                return
+            yield key, line
+
+
+def format_timeline_line(key, line):
+    """为时间线中的行加上日期前缀（续行保持原样）"""
+    if not LINE_TIME.match(line):
+        return line
+    return f"{date.fromordinal(key // 86400):%Y-%m-%d} {line}"
+
+
+def export_log_timeline(directory, out, start=None, end=None, cancel_event=None):
+    """
+    将合并后的时间线逐行写出（带日期前缀）
+    :param out: 已打开的文本文件对象
+    :param cancel_event: 设置后提前结束
+    :return: 写出的行数
+    """
+    count = 0
+    for key, line in iter_log_timeline(directory, start, end):
+        if cancel_event is not None and count % 4096 == 0 and cancel_event.is_set():
+            break
+        out.write(format_timeline_line(key, line) + "\n")
+        count += 1
+    return count
+
+
+def _lower_thread_priority():
+    """尽量降低当前线程优先级（仅Windows有效，失败忽略）"""
+    if sys.platform != "win32":
+        return
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetThreadPriority(kernel32.GetCurrentThread(), -2)  # THREAD_PRIORITY_LOWEST
+    except Exception:
+        pass
+
+
+class LogRetentionManager:
+    """
+    日志保留管理：低优先级后台线程压缩已切分的日志分段，并限制日志总占用空间
+    :param handler: DailyRotatingFileHandler（压缩时持有其锁，避免与切分改名冲突）
+    :param max_total_bytes: 日志目录总占用上限（超出时从最旧的分段开始删除）
+    :param interval: 定期检查间隔（秒）
+    """
+
+    def __init__(self, handler, max_total_bytes=50 * 1024 * 1024, interval=600):
+        self.handler = handler
+        self.max_total_bytes = max_total_bytes
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        handler.on_rollover = self.wake
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="LogRetention", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def wake(self):
+        """切分后立即触发一次压缩"""
+        self._wake.set()
+
+    def _run(self):
+        _lower_thread_priority()
+        while not self._stopped.is_set():
+            try:
+                self.compress_pending()
+                self.enforce_budget()
+            except Exception as e:
+                logging.warning("日志压缩/清理失败：%s", e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _is_active(self, path):
+        return os.path.abspath(path) == os.path.abspath(self.handler.baseFilename)
+
+    def compress_pending(self):
+        """压缩全部未压缩的非当前分段"""
+        for path in list_log_segments(self.handler.directory):
+            if self._stopped.is_set():
+                return
+            if path.endswith(".gz") or self._is_active(path):
+                continue
+            # 持有处理器锁：压缩期间不会发生切分改名
+            self.handler.acquire()
+            try:
+                if not os.path.exists(path) or self._is_active(path):
+                    continue
+                tmp_path = path + ".gz.tmp"
+                with open(path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst, 256 * 1024)
+                os.replace(tmp_path, path + ".gz")
+                os.remove(path)
+            finally:
+                self.handler.release()
+
+    def enforce_budget(self):
+        """总占用超出上限时，按修改时间从旧到新删除非当前分段"""
+        enforce_size_budget(list_log_segments(self.handler.directory), self.max_total_bytes,
+                            is_active=self._is_active, lock=self.handler.lock)
+
+
+def enforce_size_budget(paths, max_total_bytes, is_active=None, lock=None):
+    """
+    总占用超出上限时，按修改时间从旧到新删除文件（日志分段、遥测分段共用）
+    :param paths: 参与统计的文件
+    :param is_active: is_active(路径) 为真的文件（正在写入）只计入占用，不删除
+    :param lock: 删除时持有的锁（避免与写入方切分改名冲突）
+    :return: 删除的文件数
+    """
+    files = []
+    total = 0
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        total += size
+        if not (is_active and is_active(path)):
+            files.append((mtime, size, path))
+
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= max_total_bytes:
+            break
+        if lock is not None:
+            lock.acquire()
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            pass
+        finally:
+            if lock is not None:
+                lock.release()
+    return removed
+
+
+class LogTailFollower:
+    """
+    日志尾部跟踪器：记住文件偏移和文件标识，每次只读取新追加的字节
+    检测到切分（文件标识变化）或截断（文件变小）时从新文件末尾重新同步
+    :param initial_bytes: 首次打开或重新同步时，从文件末尾回读的字节数
+    """
+
+    def __init__(self, initial_bytes=256 * 1024):
+        self.initial_bytes = initial_bytes
+        self.path = None
+        self._identity = None
+        self._offset = 0
+        self._partial = b""  # 末尾尚未写完整的一行
+        self._skip_first = False  # 从文件中间开始读时丢弃第一行残片
+
+    def reset(self):
+        """下次 poll 时强制重新同步"""
+        self.path = None
+
+    def _resync(self, path, st):
+        self.path = path
+        self._identity = (st.st_dev, st.st_ino)
+        self._offset = max(0, st.st_size - self.initial_bytes)
+        self._partial = b""
+        self._skip_first = self._offset > 0
+
+    def poll(self, path):
+        """
+        读取新增的完整行
+        :return: (新行列表, 是否重新同步)；重新同步时调用方应清空已显示的内容
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return [], False
+
+        resynced = False
+        if path != self.path or (st.st_dev, st.st_ino) != self._identity or st.st_size < self._offset:
+            self._resync(path, st)
+            resynced = True
+        if st.st_size == self._offset:
+            return [], resynced
+
+        with open(path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(st.st_size - self._offset)
+        self._offset += len(data)
+        data = self._partial + data
+        self._partial = b""
+
+        if self._skip_first:
+            newline = data.find(b"\n")
+            if newline < 0:
+                return [], resynced
+            data = data[newline + 1:]
+            self._skip_first = False
+
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+        return [line.decode("utf-8", errors="replace").rstrip("\r") for line in lines], resynced
@@ -0,0 +1,541 @@
+import gzip
+import mmap
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+import numpy as np
+
+from LogUtils import MODE_CHANGE_TAG, open_log_segment
+
+# 行首时间：HH:MM:SS，合并时间线导出的行带 YYYY-MM-DD 日期前缀
+TIME_PREFIX = re.compile(rb"^(?:(\d{4})-(\d{2})-(\d{2}) )?(\d{2}):(\d{2}):(\d{2})")
+
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+# 日志行格式：HH:MM:SS - 级别 - 消息（旧日志没有级别字段）
+LEVEL_PREFIX = re.compile(r"^\d{2}:\d{2}:\d{2} - (DEBUG|INFO|WARNING|ERROR|CRITICAL) - ")
+TEMP_VALUE = re.compile(r"(?:CPU|GPU): (-?\d+(?:\.\d+)?)℃")
+# 模式切换：新日志按写盘时追加的标记判断，旧日志没有标记，按消息文本兜底
+MODE_CHANGE = re.compile(re.escape(MODE_CHANGE_TAG) + r"|切换|状态更新|当前系统模式|强冷模式已|强冷模式同步|风扇同速模式")
+ERROR_WORDS = re.compile(r"失败|错误|异常")
+
+
+class MappedLogFile:
+    """
+    内存映射的日志文件 + 后台构建的行偏移索引
+    索引按块增量构建，构建过程中即可读取已索引的行；.gz 分段先解压到临时文件再映射
+    :param path: 日志文件路径（.txt / .gz）
+    :param chunk_size: 每次扫描换行符的块大小
+    :param source: 内容生成函数（参数为二进制文件对象），指定时写入临时文件后映射，忽略 path
+    """
+
+    def __init__(self, path=None, chunk_size=16 * 1024 * 1024, source=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.source = source
+        self.size = 0
+        self.indexed_bytes = 0  # 已扫描的字节数
+        self.ready = False  # 索引是否构建完成
+        self.error = None
+        self._file = None
+        self._mm = None
+        self._starts = np.zeros(1, dtype=np.int64)  # 每行起始偏移（构建中不断替换为更长的数组）
+        self._closed = False
+        self._release_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._build, name="LogIndex", daemon=True)
+        self._thread.start()
+
+    def _open(self):
+        if self.source is not None:
+            # 动态生成的内容（如合并时间线）：写入临时文件后映射，关闭时自动删除
+            self._file = tempfile.TemporaryFile()
+            self.source(self._file)
+            self._file.flush()
+        elif self.path.endswith(".gz"):
+            # 压缩分段无法直接映射：流式解压到临时文件
+            self._file = tempfile.TemporaryFile()
+            with gzip.open(self.path, "rb") as src:
+                shutil.copyfileobj(src, self._file, 1024 * 1024)
+            self._file.flush()
+        else:
+            self._file = open(self.path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        if self.size:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _build(self):
+        try:
+            self._open()
+            pos = 0
+            while pos < self.size and not self._closed:
+                end = min(pos + self.chunk_size, self.size)
+                chunk = np.frombuffer(self._mm, dtype=np.uint8, count=end - pos, offset=pos)
+                newlines = np.flatnonzero(chunk == 10) + (pos + 1)
+                del chunk  # 释放对映射内存的引用
+                if len(newlines):
+                    self._starts = np.concatenate((self._starts, newlines))
+                pos = end
+                self.indexed_bytes = pos
+            # 文件以换行结尾时最后一个起始偏移是文件末尾，不是一行
+            if len(self._starts) > 1 and self._starts[-1] >= self.size:
+                self._starts = self._starts[:-1]
+        except Exception as e:
+            self.error = e
+        finally:
+            self.ready = True
+            if self._closed:
+                self._release()
+
+    @property
+    def line_count(self):
+        return self._count(*self._snapshot())
+
+    def _snapshot(self):
+        """同时取出 (起始偏移数组, 是否构建完成)：先读 ready，避免拿到收尾裁剪前的数组却当作已完成"""
+        ready = self.ready
+        return self._starts, ready
+
+    def _count(self, starts, ready):
+        if self.size == 0:
+            return 0
+        return len(starts) if ready else len(starts) - 1
+
+    def _line_bounds(self, index, starts):
+        start = int(starts[index])
+        end = int(starts[index + 1]) - 1 if index + 1 < len(starts) else self.size
+        return start, end
+
+    def get_lines(self, first, count):
+        """读取 [first, first+count) 范围的行（只解码这些行）"""
+        # 行数必须从同一份快照计算，索引线程随时可能换入更长的数组
+        starts, ready = self._snapshot()
+        total = self._count(starts, ready)
+        lines = []
+        for i in range(max(0, first), min(first + count, total)):
+            start, end = self._line_bounds(i, starts)
+            lines.append(self._mm[start:end].decode("utf-8", errors="replace").rstrip("\r\n"))
+        return lines
+
+    def line_time(self, index):
+        """
+        第 index 行的时间（秒），没有时间前缀返回None
+        带日期前缀的行返回自公元元年起的秒数，否则为当天的秒数
+        """
+        start = int(self._starts[index])
+        match = TIME_PREFIX.match(self._mm[start:start + 19])
+        if not match:
+            return None
+        year, month, day, h, m, s = match.groups()
+        seconds = int(h) * 3600 + int(m) * 60 + int(s)
+        if year:
+            seconds += date(int(year), int(month), int(day)).toordinal() * 86400
+        return seconds
+
+    def first_time(self):
+        """前若干行中第一个有效的时间（用于推断带日期文件的起始日期）"""
+        for i in range(min(self.line_count, 100)):
+            value = self.line_time(i)
+            if value is not None:
+                return value
+        return None
+
+    def find_time(self, seconds):
+        """二分查找第一条时间不早于 seconds 的行（跳过没有时间前缀的续行）"""
+        total = self.line_count
+        low, high = 0, total
+        while low < high:
+            mid = (low + high) // 2
+            probe = mid
+            value = self.line_time(probe) if probe < total else None
+            while value is None and probe + 1 < high:
+                probe += 1
+                value = self.line_time(probe)
+            if value is None or value >= seconds:
+                high = mid
+            else:
+                low = probe + 1
+        return min(low, max(0, total - 1))
+
+    def _release(self):
+        with self._release_lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def close(self):
+        """关闭映射；索引线程仍在运行时由它在退出前释放"""
+        self._closed = True
+        self._thread.join(timeout=0.5)
+        if not self._thread.is_alive():
+            self._release()
+
+
+class VirtualLogView(tk.Frame):
+    """
+    虚拟化日志查看组件：只渲染可见范围内的行，滚动时按需从映射文件解码
+    支持按 HH:MM:SS 或 YYYY-MM-DD HH:MM:SS 跳转
+    :param path: 日志文件路径
+    :param source: 内容生成函数（见 MappedLogFile）
+    """
+
+    def __init__(self, master=None, path=None, font=("Consolas", 13), source=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.log_file = MappedLogFile(path, source=source)
+        self.first_line = 0
+        self.font = tkfont.Font(font=font)
+        self._poll_job = None
+
+        # 顶部工具栏：时间跳转 + 索引状态
+        toolbar = ttk.Frame(self)
+        toolbar.pack(fill="x", pady=(0, 5))
+        ttk.Label(toolbar, text="跳转到时间：").pack(side="left")
+        self.time_var = tk.StringVar(value="00:00:00")
+        time_entry = ttk.Entry(toolbar, textvariable=self.time_var, width=10)
+        time_entry.pack(side="left", padx=5)
+        time_entry.bind("<Return>", lambda e: self.jump_to_time(self.time_var.get()))
+        ttk.Button(toolbar, text="跳转", command=lambda: self.jump_to_time(self.time_var.get())).pack(side="left")
+        self.status_var = tk.StringVar(value="正在建立索引...")
+        ttk.Label(toolbar, textvariable=self.status_var).pack(side="right")
+
+        body = ttk.Frame(self)
+        body.pack(fill="both", expand=True)
+        self.text = tk.Text(body, wrap=tk.NONE, font=self.font, state="disabled")
+        self.text.pack(side="left", fill="both", expand=True)
+        self.scroll = ttk.Scrollbar(body, command=self._on_scrollbar)
+        self.scroll.pack(side="right", fill="y")
+
+        self.text.bind("<Configure>", lambda e: self.render())
+        self.text.bind("<MouseWheel>", lambda e: self.scroll_lines(-3 if e.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda e: self.scroll_lines(-3))
+        self.text.bind("<Button-5>", lambda e: self.scroll_lines(3))
+        self.text.bind("<Prior>", lambda e: self.scroll_lines(-self.visible_rows))
+        self.text.bind("<Next>", lambda e: self.scroll_lines(self.visible_rows))
+        self.text.bind("<Home>", lambda e: self.goto_line(0))
+        self.text.bind("<End>", lambda e: self.goto_line(self.log_file.line_count))
+
+        self.bind("<Destroy>", self._on_destroy)
+        self._poll_index()
+
+    @property
+    def visible_rows(self):
+        return max(1, self.text.winfo_height() // self.font.metrics("linespace"))
+
+    def _poll_index(self):
+        """索引构建期间定时刷新状态和滚动条"""
+        log_file = self.log_file
+        if log_file.error:
+            self.status_var.set(f"打开失败：{log_file.error}")
+            return
+        if log_file.ready:
+            self.status_var.set(f"共 {log_file.line_count} 行")
+        else:
+            percent = log_file.indexed_bytes * 100 // max(1, log_file.size)
+            self.status_var.set(f"正在建立索引 {percent}%（{log_file.line_count} 行）")
+        self.render()
+        if not log_file.ready:
+            self._poll_job = self.after(100, self._poll_index)
+
+    def render(self):
+        """渲染当前可见窗口的行"""
+        total = self.log_file.line_count
+        rows = self.visible_rows
+        self.first_line = max(0, min(self.first_line, total - rows))
+        lines = self.log_file.get_lines(self.first_line, rows) if total else []
+
+        self.text.config(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        self.text.config(state="disabled")
+
+        if total:
+            self.scroll.set(self.first_line / total, min(1.0, (self.first_line + rows) / total))
+        else:
+            self.scroll.set(0.0, 1.0)
+
+    def goto_line(self, line):
+        self.first_line = max(0, int(line))
+        self.render()
+
+    def scroll_lines(self, delta):
+        self.goto_line(self.first_line + delta)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.goto_line(float(value) * self.log_file.line_count)
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_lines(int(value) * step)
+
+    def jump_to_time(self, text):
+        """跳转到第一条不早于指定时间（[YYYY-MM-DD ]HH:MM:SS）的行"""
+        try:
+            day_text, _, time_text = text.strip().rpartition(" ")
+            parts = [int(p) for p in time_text.split(":")]
+            while len(parts) < 3:
+                parts.append(0)
+            seconds = parts[0] * 3600 + parts[1] * 60 + parts[2]
+            day = date.fromisoformat(day_text.strip()).toordinal() if day_text.strip() else None
+        except ValueError:
+            self.status_var.set("时间格式应为 HH:MM:SS 或 YYYY-MM-DD HH:MM:SS")
+            return
+        if not self.log_file.line_count:
+            return
+        first = self.log_file.first_time()
+        dated = first is not None and first >= 86400
+        if dated:
+            # 带日期的文件：未指定日期时取第一行的日期
+            seconds += (first // 86400 if day is None else day) * 86400
+        self.goto_line(self.log_file.find_time(seconds))
+
+    def _on_destroy(self, event):
+        """组件销毁（含直接关闭窗口）时释放映射"""
+        if event.widget is not self:
+            return
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        self.log_file.close()
+
+
+def line_level(line):
+    """日志行的级别；旧日志没有级别字段时按关键字推断（含失败/错误视为ERROR）"""
+    match = LEVEL_PREFIX.match(line)
+    if match:
+        return match.group(1)
+    return "ERROR" if ERROR_WORDS.search(line) else "INFO"
+
+
+class LogFilter:
+    """
+    日志过滤条件（所有已设置的条件同时满足才算匹配）
+    :param level: 最低级别（如 WARNING 同时匹配 WARNING/ERROR/CRITICAL），None 表示不限
+    :param text: 关键字（不区分大小写）或正则表达式
+    :param use_regex: text 是否按正则表达式解析（无效时抛出 re.error）
+    :param mode_changes_only: 只保留模式切换相关的行
+    :param errors_only: 只保留错误行
+    :param temp_above: 只保留 CPU/GPU 温度高于该值的行
+    """
+
+    def __init__(self, level=None, text="", use_regex=False, mode_changes_only=False, errors_only=False,
+                 temp_above=None):
+        self.min_level = LEVELS.index(level) if level else 0
+        self.pattern = None
+        if text:
+            self.pattern = re.compile(text if use_regex else re.escape(text), re.IGNORECASE)
+        self.mode_changes_only = mode_changes_only
+        self.errors_only = errors_only
+        self.temp_above = temp_above
+
+    @property
+    def is_empty(self):
+        return not (self.min_level or self.pattern or self.mode_changes_only or self.errors_only or
+                    self.temp_above is not None)
+
+    def match(self, line):
+        """判断单行是否匹配（开销小的条件先判断）"""
+        if self.min_level or self.errors_only:
+            level = LEVELS.index(line_level(line))
+            if level < self.min_level or (self.errors_only and level < LEVELS.index("ERROR")):
+                return False
+        if self.mode_changes_only and not MODE_CHANGE.search(line):
+            return False
+        if self.temp_above is not None:
+            temps = TEMP_VALUE.findall(line)
+            if not temps or max(float(t) for t in temps) <= self.temp_above:
+                return False
+        if self.pattern is not None and not self.pattern.search(line):
+            return False
+        return True
+
+
+class LogSearch:
+    """
+    后台日志搜索：工作线程按顺序流式扫描各分段，匹配行按批次放入队列
+    界面线程通过 drain() 取回批次（不阻塞），新搜索开始前调用 cancel() 中止旧线程
+    :param paths: 按时间顺序排列的日志分段
+    :param log_filter: LogFilter 实例
+    :param batch_size: 每批最多行数
+    :param batch_interval: 批次最长积攒时间（秒），保证首批结果尽快出现
+    :param max_results: 最多返回的匹配行数
+    """
+
+    def __init__(self, paths, log_filter, batch_size=200, batch_interval=0.1, max_results=5000):
+        self.paths = list(paths)
+        self.log_filter = log_filter
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.max_results = max_results
+        self.scanned_lines = 0
+        self.matched = 0
+        self.truncated = False  # 是否因达到上限提前结束
+        self.current_path = None
+        self.error = None
+        self.done = False
+        self._batches = queue.Queue()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="LogSearch", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        batch = []
+        last_flush = time.monotonic()
+        try:
+            for path in self.paths:
+                self.current_path = path
+                with open_log_segment(path) as f:
+                    for line in f:
+                        if self._cancelled.is_set():
+                            return
+                        self.scanned_lines += 1
+                        if self.log_filter.match(line):
+                            batch.append(line.rstrip("\r\n"))
+                            self.matched += 1
+                            if self.matched >= self.max_results:
+                                self.truncated = True
+                                return
+                        elif self.scanned_lines % 4096:
+                            continue
+                        now = time.monotonic()
+                        if batch and (len(batch) >= self.batch_size or now - last_flush >= self.batch_interval):
+                            self._batches.put(batch)
+                            batch = []
+                            last_flush = now
+        except Exception as e:
+            self.error = e
+        finally:
+            if batch and not self._cancelled.is_set():
+                self._batches.put(batch)
+            self.done = True
+
+    def cancel(self):
+        """中止搜索（工作线程在下一行检查时退出）"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def drain(self, max_batches=20):
+        """取出已就绪的匹配行（最多 max_batches 批，避免单次插入过多阻塞界面）"""
+        lines = []
+        for _ in range(max_batches):
+            try:
+                lines.extend(self._batches.get_nowait())
+            except queue.Empty:
+                break
+        return lines
+
+    @property
+    def finished(self):
+        """线程已结束且结果已全部取走"""
+        return self.done and self._batches.empty()
+
+
+class LogFilterBar(ttk.Frame):
+    """
+    日志过滤栏：级别、关键字/正则、仅模式切换、仅错误、温度高于
+    输入停顿后才触发过滤（防抖），条件无效时在状态栏提示
+    :param on_change: 条件变化回调，参数为 LogFilter；没有任何条件时为 None
+    :param on_cancel: 点击“停止”时的回调
+    :param delay_ms: 防抖延迟（毫秒）
+    """
+
+    def __init__(self, master=None, on_change=None, on_cancel=None, delay_ms=300, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_change = on_change
+        self.on_cancel = on_cancel
+        self.delay_ms = delay_ms
+        self._job = None
+
+        self.level_var = tk.StringVar(value="全部")
+        self.text_var = tk.StringVar()
+        self.regex_var = tk.BooleanVar(value=False)
+        self.mode_var = tk.BooleanVar(value=False)
+        self.error_var = tk.BooleanVar(value=False)
+        self.temp_var = tk.StringVar()
+        self.all_segments_var = tk.BooleanVar(value=True)  # 是否搜索全部历史分段
+        self.status_var = tk.StringVar()
+
+        ttk.Label(self, text="级别：").pack(side="left")
+        ttk.Combobox(self, textvariable=self.level_var, values=("全部",) + LEVELS[1:], state="readonly",
+                     width=9).pack(side="left", padx=(0, 8))
+        ttk.Label(self, text="搜索：").pack(side="left")
+        ttk.Entry(self, textvariable=self.text_var, width=24).pack(side="left")
+        ttk.Checkbutton(self, text="正则", variable=self.regex_var).pack(side="left", padx=(5, 8))
+        ttk.Checkbutton(self, text="仅模式切换", variable=self.mode_var).pack(side="left", padx=(0, 8))
+        ttk.Checkbutton(self, text="仅错误", variable=self.error_var).pack(side="left", padx=(0, 8))
+        ttk.Label(self, text="温度高于：").pack(side="left")
+        ttk.Entry(self, textvariable=self.temp_var, width=6).pack(side="left")
+        ttk.Label(self, text="℃").pack(side="left", padx=(0, 8))
+        ttk.Checkbutton(self, text="全部分段", variable=self.all_segments_var).pack(side="left", padx=(0, 8))
+        ttk.Button(self, text="停止", command=self._cancel, width=6).pack(side="left", padx=(0, 5))
+        ttk.Button(self, text="清除", command=self.clear, width=6).pack(side="left")
+        ttk.Label(self, textvariable=self.status_var).pack(side="right")
+
+        for var in (self.level_var, self.text_var, self.regex_var, self.mode_var, self.error_var,
+                    self.temp_var, self.all_segments_var):
+            var.trace_add("write", self._schedule)
+
+    def _schedule(self, *args):
+        """条件变化后延迟触发，连续输入只执行最后一次"""
+        if self._job is not None:
+            self.after_cancel(self._job)
+        self._job = self.after(self.delay_ms, self._apply)
+
+    def build_filter(self):
+        """根据当前输入构造过滤条件，输入无效时抛出 ValueError"""
+        temp_text = self.temp_var.get().strip()
+        try:
+            temp_above = float(temp_text) if temp_text else None
+        except ValueError:
+            raise ValueError("温度应为数字")
+        level = self.level_var.get()
+        try:
+            return LogFilter(
+                level=None if level == "全部" else level,
+                text=self.text_var.get(),
+                use_regex=self.regex_var.get(),
+                mode_changes_only=self.mode_var.get(),
+                errors_only=self.error_var.get(),
+                temp_above=temp_above,
+            )
+        except re.error as e:
+            raise ValueError(f"正则表达式无效：{e}")
+
+    def _apply(self):
+        self._job = None
+        try:
+            log_filter = self.build_filter()
+        except ValueError as e:
+            self.status_var.set(str(e))
+            return
+        self.status_var.set("")
+        if self.on_change:
+            self.on_change(None if log_filter.is_empty else log_filter)
+
+    def _cancel(self):
+        if self.on_cancel:
+            self.on_cancel()
+
+    def clear(self):
+        """清空所有条件（恢复实时日志）"""
+        self.level_var.set("全部")
+        self.text_var.set("")
+        self.regex_var.set(False)
+        self.mode_var.set(False)
+        self.error_var.set(False)
+        self.temp_var.set("")
+
+    def set_status(self, text):
+        self.status_var.set(text)
@@ -0,0 +1,444 @@
+import csv
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+from LogUtils import enforce_size_budget
+
+# 文件头：魔数、版本、单条记录长度、文件创建时的墙钟时间、对应的单调时钟时间
+HEADER = struct.Struct("<4sHHdd")
+MAGIC = b"IGFT"
+VERSION = 1
+
+# 单条记录（24字节）：单调时间戳、CPU/GPU温度（0.1℃）、CPU/GPU转速、CPU/GPU目标转速、风扇模式、性能模式、显卡模式
+RECORD = struct.Struct("<dhhHHHHBbbx")
+
+FIELDS = ("time", "cpu_temp", "gpu_temp", "cpu_rpm", "gpu_rpm",
+          "cpu_target", "gpu_target", "fan_mode", "perf_mode", "gpu_mode")
+TelemetryRecord = namedtuple("TelemetryRecord", FIELDS)
+
+# 风扇模式编码
+FAN_MODE_CODE = {"auto": 0, "manual": 1, "full": 2}
+FAN_MODE_NAME = {v: k for k, v in FAN_MODE_CODE.items()}
+
+NO_TARGET = 0xFFFF  # 非自定义模式下没有目标转速
+FILE_PREFIX = "telemetry_"
+FILE_SUFFIX = ".bin"
+# 实时写入的分段：telemetry_YYYYMMDD_NN.bin（日志导入生成的 _log 文件不在此列）
+LIVE_SEGMENT = re.compile(rf"{FILE_PREFIX}\d{{8}}_\d+{re.escape(FILE_SUFFIX)}$")
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, int(value)))
+
+
+def pack_record(timestamp, cpu_temp, gpu_temp, cpu_rpm, gpu_rpm, cpu_target=None, gpu_target=None,
+                fan_mode="auto", perf_mode=-1, gpu_mode=-1):
+    """打包一条定长记录（超出字段范围的值会被截断）"""
+    return RECORD.pack(
+        timestamp,
+        _clamp(round(cpu_temp * 10), -32768, 32767),
+        _clamp(round(gpu_temp * 10), -32768, 32767),
+        _clamp(cpu_rpm, 0, 0xFFFF),
+        _clamp(gpu_rpm, 0, 0xFFFF),
+        NO_TARGET if cpu_target is None else _clamp(cpu_target, 0, 0xFFFE),
+        NO_TARGET if gpu_target is None else _clamp(gpu_target, 0, 0xFFFE),
+        FAN_MODE_CODE.get(fan_mode, 0),
+        _clamp(perf_mode, -128, 127),
+        _clamp(gpu_mode, -128, 127),
+    )
+
+
+def write_wall_clock_file(path, chunks, append=False):
+    """
+    写出时间戳即为墙钟时间的遥测文件（文件头两个锚点均为0），用于导入历史数据
+    :param chunks: 已打包记录的字节串序列
+    :param append: 追加到已有文件末尾（不重复写文件头）
+    :return: 写出的记录条数
+    """
+    size = 0
+    append = append and os.path.exists(path)
+    with open(path, "ab" if append else "wb") as f:
+        if not append:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0.0, 0.0))
+        for chunk in chunks:
+            f.write(chunk)
+            size += len(chunk)
+    return size // RECORD.size
+
+
+class TelemetryWriter:
+    """
+    二进制遥测写入器：每次监控追加一条定长记录
+    文件按天和大小切分，每次启动都会新开一个分段（保证分段内单调时钟连续）
+    新开分段后由后台线程按总占用上限从最旧的分段开始删除，与文本日志使用同一套清理规则
+    只统计实时写入的分段，日志导入生成的 _log 文件不参与（不会被删除）
+    :param directory: 遥测文件目录
+    :param max_bytes: 单个分段最大字节数
+    :param max_total_bytes: 实时分段总占用上限
+    :param flush_interval: 每写入多少条记录刷新一次缓冲
+    """
+
+    def __init__(self, directory, max_bytes=4 * 1024 * 1024, max_total_bytes=50 * 1024 * 1024, flush_interval=60):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_total_bytes = max_total_bytes
+        self._path = None
+        self.flush_interval = flush_interval
+        self._file = None
+        self._day = None
+        self._size = 0
+        self._pending = 0
+        self._closed = False
+        self._lock = threading.Lock()  # 监控线程写入与界面线程关闭互斥
+        os.makedirs(self.directory, exist_ok=True)
+        # 清理放到后台线程，监控线程持锁写入时不做目录扫描和删除
+        self._cleanup_wake = threading.Event()
+        self._cleanup_stopped = threading.Event()
+        self._cleanup_thread = threading.Thread(target=self._run_cleanup, name="TelemetryRetention", daemon=True)
+        self._cleanup_thread.start()
+
+    def _next_path(self, day):
+        """当天下一个未使用的分段文件名"""
+        index = 0
+        while True:
+            path = os.path.join(self.directory, f"{FILE_PREFIX}{day}_{index:02d}{FILE_SUFFIX}")
+            if not os.path.exists(path):
+                return path
+            index += 1
+
+    def _open(self, day):
+        self._close_file()
+        self._path = self._next_path(day)
+        self._file = open(self._path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, time.time(), time.monotonic()))
+        self._day = day
+        self._size = HEADER.size
+        self._pending = 0
+        self._cleanup_wake.set()
+
+    def _run_cleanup(self):
+        while not self._cleanup_stopped.is_set():
+            self._cleanup_wake.wait()
+            self._cleanup_wake.clear()
+            if self._cleanup_stopped.is_set():
+                return
+            self.enforce_budget()
+
+    def enforce_budget(self):
+        """实时分段总占用超出上限时删除最旧的分段（当前分段除外），在后台清理线程中调用"""
+        paths = [p for p in list_telemetry_files(self.directory) if LIVE_SEGMENT.match(os.path.basename(p))]
+        try:
+            removed = enforce_size_budget(paths, self.max_total_bytes, is_active=lambda path: path == self._path)
+        except Exception as e:
+            logging.warning("遥测文件清理失败：%s", e)
+            return
+        if removed:
+            logging.info("遥测目录超出 %dMB，已删除 %d 个最旧的分段", self.max_total_bytes // (1024 * 1024), removed)
+
+    def append(self, cpu_temp, gpu_temp, cpu_rpm, gpu_rpm, cpu_target=None, gpu_target=None,
+               fan_mode="auto", perf_mode=-1, gpu_mode=-1, timestamp=None):
+        """追加一条记录（timestamp 为 time.monotonic() 时间，缺省取当前）"""
+        with self._lock:
+            if self._closed:
+                return
+            day = datetime.now().strftime("%Y%m%d")
+            if self._file is None or day != self._day or self._size + RECORD.size > self.max_bytes:
+                self._open(day)
+            self._write(pack_record(
+                time.monotonic() if timestamp is None else timestamp,
+                cpu_temp, gpu_temp, cpu_rpm, gpu_rpm, cpu_target, gpu_target, fan_mode, perf_mode, gpu_mode,
+            ))
+
+    def _write(self, data):
+        self._file.write(data)
+        self._size += len(data)
+        self._pending += 1
+        if self._pending >= self.flush_interval:
+            self._file.flush()
+            self._pending = 0
+
+    def flush(self):
+        with self._lock:
+            if self._file:
+                self._file.flush()
+                self._pending = 0
+
+    def _close_file(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """关闭写入器（之后的追加会被忽略）"""
+        with self._lock:
+            self._closed = True
+            self._close_file()
+        self._cleanup_stopped.set()
+        self._cleanup_wake.set()
+
+
+def list_telemetry_files(directory):
+    """按时间顺序列出目录下的遥测分段"""
+    if not os.path.isdir(directory):
+        return []
+    names = [n for n in os.listdir(directory) if n.startswith(FILE_PREFIX) and n.endswith(FILE_SUFFIX)]
+    return [os.path.join(directory, n) for n in sorted(names)]
+
+
+def _read_header(f, path):
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"遥测文件头不完整：{path}")
+    magic, version, record_size, wall_anchor, mono_anchor = HEADER.unpack(header)
+    if magic != MAGIC or record_size != RECORD.size:
+        raise ValueError(f"不支持的遥测文件：{path}（版本{version}）")
+    return wall_anchor - mono_anchor  # 单调时间 + 偏移 = 墙钟时间
+
+
+def iter_records(path, chunk_records=4096):
+    """流式读取单个分段，时间戳换算为墙钟时间（秒）；末尾不完整的记录会被忽略"""
+    with open(path, "rb") as f:
+        offset = _read_header(f, path)
+        chunk_size = RECORD.size * chunk_records
+        while True:
+            chunk = f.read(chunk_size)
+            usable = len(chunk) - len(chunk) % RECORD.size
+            for values in RECORD.iter_unpack(chunk[:usable]):
+                ts, cpu_t, gpu_t, cpu_rpm, gpu_rpm, cpu_target, gpu_target, fan, perf, gpu = values
+                yield TelemetryRecord(
+                    ts + offset, cpu_t / 10, gpu_t / 10, cpu_rpm, gpu_rpm,
+                    None if cpu_target == NO_TARGET else cpu_target,
+                    None if gpu_target == NO_TARGET else gpu_target,
+                    FAN_MODE_NAME.get(fan, "auto"), perf, gpu,
+                )
+            if len(chunk) < chunk_size:
+                break
+
+
+def iter_telemetry(directory, start=None, end=None):
+    """流式读取目录下全部分段，可按墙钟时间范围过滤"""
+    for path in list_telemetry_files(directory):
+        for record in iter_records(path):
+            if start is not None and record.time < start:
+                continue
+            if end is not None and record.time > end:
+                continue
+            yield record
+
+
+def export_csv(records, out_path):
+    """将记录流导出为CSV（逐行写出，内存占用恒定），返回导出条数"""
+    count = 0
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for record in records:
+            row = list(record)
+            row[0] = datetime.fromtimestamp(record.time).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+            writer.writerow(["" if v is None else v for v in row])
+            count += 1
+    return count
+
+
+def load_numpy(paths):
+    """
+    将一个或多个分段直接加载为NumPy结构化数组（不逐条解包）
+    温度换算为℃，时间换算为墙钟时间；目标转速为 NO_TARGET 表示无目标
+    """
+    raw_dtype = np.dtype({
+        "names": ["time", "cpu_temp", "gpu_temp", "cpu_rpm", "gpu_rpm",
+                  "cpu_target", "gpu_target", "fan_mode", "perf_mode", "gpu_mode"],
+        "formats": ["<f8", "<i2", "<i2", "<u2", "<u2", "<u2", "<u2", "u1", "i1", "i1"],
+        "offsets": [0, 8, 10, 12, 14, 16, 18, 20, 21, 22],
+        "itemsize": RECORD.size,
+    })
+    out_dtype = np.dtype([("time", "<f8"), ("cpu_temp", "<f4"), ("gpu_temp", "<f4"),
+                          ("cpu_rpm", "<u2"), ("gpu_rpm", "<u2"), ("cpu_target", "<u2"),
+                          ("gpu_target", "<u2"), ("fan_mode", "u1"), ("perf_mode", "i1"), ("gpu_mode", "i1")])
+
+    if isinstance(paths, str):
+        paths = [paths]
+
+    parts = []
+    for path in paths:
+        with open(path, "rb") as f:
+            offset = _read_header(f, path)
+            data = f.read()
+        raw = np.frombuffer(data[:len(data) - len(data) % RECORD.size], dtype=raw_dtype)
+        part = np.empty(len(raw), dtype=out_dtype)
+        for name in out_dtype.names:
+            part[name] = raw[name]
+        part["time"] += offset
+        part["cpu_temp"] /= 10
+        part["gpu_temp"] /= 10
+        parts.append(part)
+
+    return np.concatenate(parts) if parts else np.empty(0, dtype=out_dtype)
+
+
+class TelemetryRingBuffer:
+    """
+    内存遥测环形缓冲区（按列预分配NumPy数组）
+    单写者（监控线程）O(1)追加；读者通过序号校验无锁获取一致快照
+    :param capacity: 最多保存的采样条数（默认1小时@1秒）
+    """
+
+    COLUMNS = ("time", "cpu_temp", "gpu_temp", "cpu_rpm", "gpu_rpm", "cpu_target", "gpu_target")
+    WINDOWS = (60, 300, 3600)  # 默认统计窗口：1/5/60分钟
+
+    def __init__(self, capacity=3600):
+        self.capacity = capacity
+        self._columns = {name: np.full(capacity, np.nan) for name in self.COLUMNS}
+        self._count = 0  # 累计写入条数（写索引 = count % capacity）
+        self._seq = 0  # 写入序号：奇数表示正在写入
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def count(self):
+        """累计写入条数（可用于判断是否有新数据）"""
+        return self._count
+
+    def append(self, cpu_temp, gpu_temp, cpu_rpm, gpu_rpm, cpu_target=None, gpu_target=None, timestamp=None):
+        """追加一条采样（仅允许单一线程调用）"""
+        idx = self._count % self.capacity
+        self._seq += 1
+        cols = self._columns
+        cols["time"][idx] = time.monotonic() if timestamp is None else timestamp
+        cols["cpu_temp"][idx] = cpu_temp
+        cols["gpu_temp"][idx] = gpu_temp
+        cols["cpu_rpm"][idx] = cpu_rpm
+        cols["gpu_rpm"][idx] = gpu_rpm
+        cols["cpu_target"][idx] = np.nan if cpu_target is None else cpu_target
+        cols["gpu_target"][idx] = np.nan if gpu_target is None else gpu_target
+        self._count += 1
+        self._seq += 1
+
+    def latest(self):
+        """最新一条采样（字典），没有数据时返回None"""
+        snap = self.snapshot(last_n=1)
+        if not len(snap["time"]):
+            return None
+        return {name: float(values[0]) for name, values in snap.items()}
+
+    def snapshot(self, seconds=None, last_n=None):
+        """
+        获取按时间顺序排列的数据副本
+        :param seconds: 只取最近若干秒
+        :param last_n: 只取最近若干条
+        """
+        while True:
+            seq = self._seq
+            if seq % 2:
+                time.sleep(0)  # 写入进行中，让出执行权后重试
+                continue
+            count = self._count
+            size = min(count, self.capacity)
+            if last_n is not None:
+                size = min(size, last_n)
+            start = (count - size) % self.capacity
+            order = (np.arange(size) + start) % self.capacity
+            snap = {name: values[order] for name, values in self._columns.items()}
+            if self._seq == seq:
+                break
+
+        if seconds is not None and size:
+            mask = snap["time"] >= snap["time"][-1] - seconds
+            snap = {name: values[mask] for name, values in snap.items()}
+        return snap
+
+    def stats(self, seconds, percentile=95):
+        """统计最近若干秒内各列的最小/最大/平均/百分位值（目标转速忽略无目标采样）"""
+        snap = self.snapshot(seconds=seconds)
+        result = {}
+        for name in self.COLUMNS[1:]:
+            values = snap[name]
+            values = values[~np.isnan(values)]
+            if not len(values):
+                result[name] = None
+                continue
+            result[name] = {
+                "min": float(values.min()),
+                "max": float(values.max()),
+                "mean": float(values.mean()),
+                f"p{percentile}": float(np.percentile(values, percentile)),
+            }
+        return result
+
+    def window_stats(self, windows=WINDOWS):
+        """按多个时间窗口统计（默认1/5/60分钟），键为窗口秒数"""
+        return {seconds: self.stats(seconds) for seconds in windows}
+
+
+class LatencyStats:
+    """
+    硬件调用耗时统计（线程安全）：每种调用保留最近若干次耗时，用于诊断和自适应限速
+    :param window: 每种调用保留的最近样本数
+    """
+
+    def __init__(self, window=500):
+        self.window = window
+        self._samples = {}  # 调用名 -> 最近耗时（秒）
+        self._totals = {}  # 调用名 -> [次数, 失败次数, 最大耗时]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, name):
+        """计时上下文：with stats.measure("SetFanSpeed"): ...（异常同样计入并计为失败）"""
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, failed)
+
+    def record(self, name, seconds, failed=False):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._totals[name] = [0, 0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += failed
+            totals[2] = max(totals[2], seconds)
+
+    def recent(self, name, n=20):
+        """最近 n 次耗时的平均值（秒），没有记录返回None"""
+        with self._lock:
+            samples = self._samples.get(name)
+            if not samples:
+                return None
+            recent = list(samples)[-n:]
+        return sum(recent) / len(recent)
+
+    def snapshot(self):
+        """各调用的统计（毫秒）：次数、失败次数、最近样本的平均/P95/最大值、历史最大值"""
+        with self._lock:
+            data = {name: (np.array(samples), list(self._totals[name])) for name, samples in self._samples.items()}
+        result = {}
+        for name, (values, (count, failed, max_seconds)) in data.items():
+            values = values * 1000
+            result[name] = {
+                "count": count,
+                "failed": failed,
+                "mean_ms": round(float(values.mean()), 3),
+                "p95_ms": round(float(np.percentile(values, 95)), 3),
+                "recent_max_ms": round(float(values.max()), 3),
+                "max_ms": round(max_seconds * 1000, 3),
+            }
+        return result
@@ -0,0 +1,516 @@
+import tkinter as tk
+
+import numpy as np
+
+from CurveEditUtils import hit_test, points_in_box, shift_points
+
+# 与 matplotlib 版本一致的配色
+NORMAL_COLORS = {
+    'cpu': '#E74C3C',
+    'gpu': '#27AE60',
+    'grid': '#EEEEEE',
+    'spine': '#CCCCCC',
+    'text': '#333333'
+}
+GRAY_COLORS = {
+    'cpu': '#A0A0A0',
+    'gpu': '#888888',
+    'grid': '#F0F0F0',
+    'spine': '#DDDDDD',
+    'text': '#999999'
+}
+BACKGROUND = '#FFFFFF'
+SELECTION_COLOR = '#3498DB'
+SHIFT_MASK = 0x0001  # Tk事件state中的shift位
+FONT = ("SimHei", 9)
+TITLE_FONT = ("SimHei", 10, "bold")
+
+
+def blend(color, alpha, background=BACKGROUND):
+    """Tk画布不支持透明度：按 alpha 与背景色混合得到等效颜色"""
+    fg = [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+    bg = [int(background[i:i + 2], 16) for i in (1, 3, 5)]
+    return "#" + "".join(f"{round(b + (f - b) * alpha):02X}" for f, b in zip(fg, bg))
+
+
+class _PlotArea:
+    """
+    画布上的一个坐标区域：负责数据坐标与像素坐标的换算，以及网格、刻度、标题等静态内容
+    :param xlim: x轴数据范围 (最小, 最大)
+    :param ylim: y轴数据范围 (最小, 最大)
+    """
+
+    def __init__(self, canvas, xlim, ylim):
+        self.canvas = canvas
+        self.xlim = xlim
+        self.ylim = ylim
+        self.left = self.top = 0
+        self.width = self.height = 1
+
+    def place(self, left, top, width, height):
+        self.left, self.top = left, top
+        self.width, self.height = max(1, width), max(1, height)
+
+    def to_px(self, x, y):
+        """数据坐标 → 像素坐标（支持NumPy数组）"""
+        px = self.left + (np.asarray(x, dtype=float) - self.xlim[0]) / (self.xlim[1] - self.xlim[0]) * self.width
+        py = self.top + self.height - \
+            (np.asarray(y, dtype=float) - self.ylim[0]) / (self.ylim[1] - self.ylim[0]) * self.height
+        return px, py
+
+    def to_data(self, px, py):
+        """像素坐标 → 数据坐标"""
+        x = self.xlim[0] + (px - self.left) / self.width * (self.xlim[1] - self.xlim[0])
+        y = self.ylim[0] + (self.top + self.height - py) / self.height * (self.ylim[1] - self.ylim[0])
+        return x, y
+
+    def contains(self, px, py):
+        return self.left <= px <= self.left + self.width and self.top <= py <= self.top + self.height
+
+    def draw_frame(self, colors, title, xlabel, ylabel, xticks, yticks, tag, axis_at_zero=False, dash=(3, 3)):
+        """绘制网格、坐标轴、刻度文字和标题（统一打上 tag，便于整体删除或改色）"""
+        c = self.canvas
+        right, bottom = self.left + self.width, self.top + self.height
+        for value in xticks:
+            px, _ = self.to_px(value, self.ylim[0])
+            c.create_line(px, self.top, px, bottom, fill=colors['grid'], dash=dash, tags=(tag, "grid"))
+            c.create_text(px, bottom + 4, text=str(value), anchor="n", font=FONT, fill=colors['text'],
+                          tags=(tag, "text"))
+        for value in yticks:
+            _, py = self.to_px(self.xlim[0], value)
+            c.create_line(self.left, py, right, py, fill=colors['grid'], dash=dash, tags=(tag, "grid"))
+            c.create_text(self.left - 4, py, text=str(value), anchor="e", font=FONT, fill=colors['text'],
+                          tags=(tag, "text"))
+        # 坐标轴：曲线编辑器位于数据0处，其余在区域左/下边
+        x0, y0 = self.to_px(0, 0) if axis_at_zero else (self.left, bottom)
+        c.create_line(x0, self.top, x0, bottom, fill=colors['spine'], tags=(tag, "spine"))
+        c.create_line(self.left, y0, right, y0, fill=colors['spine'], tags=(tag, "spine"))
+        c.create_text(self.left + self.width / 2, self.top - 6, text=title, anchor="s", font=TITLE_FONT,
+                      fill=colors['text'], tags=(tag, "text"))
+        c.create_text(self.left + self.width / 2, bottom + 20, text=xlabel, anchor="n", font=FONT,
+                      fill=colors['text'], tags=(tag, "text"))
+        c.create_text(self.left - 30, self.top + self.height / 2, text=ylabel, anchor="s", angle=90, font=FONT,
+                      fill=colors['text'], tags=(tag, "text"))
+
+
+def _normalize_curve(data, default):
+    """曲线数据校验（必须是10个点），与 FanCurveWidget 的规则一致"""
+    if isinstance(data, list) and len(data) == 10:
+        return data.copy()
+    if isinstance(data, dict) and len(data) == 10:
+        return list(data.values()).copy()
+    return default.copy()
+
+
+class TkFanCurveWidget(tk.Frame):
+    """
+    纯Tk画布实现的风扇曲线编辑组件（不依赖matplotlib），接口与 FanCurveWidget 一致
+    静态内容（网格、刻度、标题）只在尺寸变化时重画；拖拽和切换编辑状态时原地修改画布元素的坐标和颜色
+    """
+
+    def __init__(self, master=None, cpu_data=None, gpu_data=None, width=700, height=400, **kwargs):
+        super().__init__(master, **kwargs)
+
+        self.fixed_temps = list(range(0, 91, 10))
+        self.display_ticks = list(range(0, 101, 10))
+
+        default = [0, 38, 38, 38, 38, 47, 55, 64, 74, 83]
+        self._cpu_speed = _normalize_curve(cpu_data, default)
+        self._gpu_speed = _normalize_curve(gpu_data, default)
+
+        # 拖拽/框选状态（与 FanCurveWidget 相同，控制点按 (曲线, 点) 数组处理）
+        self.curves = ('cpu', 'gpu')
+        self.selected = np.zeros((len(self.curves), len(self.fixed_temps)), dtype=bool)
+        self._selectable = np.ones_like(self.selected)
+        self._selectable[:, 0] = False  # 0℃点固定为0，不可选中
+        self._gesture = None  # 'drag'-拖动选中点，'box'-框选
+        self._press_curve = None
+        self._press_xy = None
+        self._origin = None
+        self._base_selection = None
+
+        self.editable = True
+        self.normal_colors = NORMAL_COLORS
+        self.gray_colors = GRAY_COLORS
+        self.overlay_color = '#2C3E50'
+        self.trail_length = 30
+
+        self.point_radius = 4
+        self.detect_radius = 14  # 控制点拾取半径（像素）
+
+        self.canvas = tk.Canvas(self, width=width, height=height, bg=BACKGROUND, highlightthickness=0)
+        self.canvas_widget = self.canvas
+        self.canvas.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+
+        self.areas = {curve: _PlotArea(self.canvas, (-5, 105), (-5, 105)) for curve in ('cpu', 'gpu')}
+        self.titles = {'cpu': "CPU 风扇曲线", 'gpu': "GPU 风扇曲线"}
+        self._items = {}  # 曲线 -> {"line": id, "points": [id], "trail": [id], "current": id}
+        self._trail_points = {'cpu': np.empty((0, 2)), 'gpu': np.empty((0, 2))}
+
+        self._create_items()
+        self.canvas.bind('<Configure>', self._on_configure)
+        self._bind_events()
+
+        # 数据回调
+        self.on_data_change = None
+
+    @property
+    def cpu_data(self):
+        return self._cpu_speed.copy()
+
+    @property
+    def gpu_data(self):
+        return self._gpu_speed.copy()
+
+    def _speeds(self, curve):
+        return self._cpu_speed if curve == 'cpu' else self._gpu_speed
+
+    def _create_items(self):
+        """创建曲线、控制点和工作点覆盖层的画布元素（之后只修改坐标和颜色）"""
+        colors = self.normal_colors if self.editable else self.gray_colors
+        for curve in ('cpu', 'gpu'):
+            items = {
+                "trail": [self.canvas.create_oval(0, 0, 0, 0, outline="", state="hidden", tags="overlay")
+                          for _ in range(self.trail_length)],
+                "line": self.canvas.create_line(0, 0, 0, 0, fill=colors[curve], width=2, tags="curve"),
+            }
+            items["points"] = [self.canvas.create_oval(0, 0, 0, 0, fill=colors[curve], outline="white",
+                                                       width=1.2, tags="curve")
+                               for _ in self.fixed_temps]
+            items["current"] = self.canvas.create_oval(0, 0, 0, 0, outline=self.overlay_color, width=2,
+                                                       state="hidden", tags="overlay")
+            items["selection"] = [self.canvas.create_oval(0, 0, 0, 0, outline=SELECTION_COLOR, width=1.5,
+                                                          state="hidden", tags="selection")
+                                  for _ in self.fixed_temps]
+            self._items[curve] = items
+        self._box = self.canvas.create_rectangle(0, 0, 0, 0, outline=SELECTION_COLOR, dash=(3, 3),
+                                                 state="hidden", tags="selection")
+
+    def _on_configure(self, event):
+        """尺寸变化时重新布局：两个正方形坐标区域并排"""
+        half = event.width / 2
+        margin_left, margin_right, margin_top, margin_bottom = 46, 10, 26, 40
+        size = max(10, min(half - margin_left - margin_right, event.height - margin_top - margin_bottom))
+        for i, curve in enumerate(('cpu', 'gpu')):
+            self.areas[curve].place(i * half + margin_left, margin_top, size, size)
+        self._draw_static()
+        self.update_plot_data()
+        self._render_overlay()
+
+    def _draw_static(self):
+        self.canvas.delete("static")
+        colors = self.normal_colors if self.editable else self.gray_colors
+        for curve in ('cpu', 'gpu'):
+            self.areas[curve].draw_frame(colors, self.titles[curve], "温度 (℃)", "转速 (%)",
+                                         self.display_ticks, self.display_ticks, "static", axis_at_zero=True)
+        self.canvas.tag_lower("static")
+
+    def set_editable(self, editable):
+        """
+        设置是否可编辑
+        :param editable: True-可编辑，False-不可编辑（置灰）
+        """
+        if editable == self.editable:
+            return
+        self.editable = editable
+        self.clear_selection()
+        cursor = "hand2" if editable else "arrow"
+        self.canvas.config(cursor=cursor)
+        self.canvas.bind('<Enter>', lambda e: self.canvas.config(cursor=cursor))
+
+        colors = self.normal_colors if editable else self.gray_colors
+        self.canvas.itemconfigure("grid", fill=colors['grid'])
+        self.canvas.itemconfigure("spine", fill=colors['spine'])
+        self.canvas.itemconfigure("text", fill=colors['text'])
+        for curve in ('cpu', 'gpu'):
+            items = self._items[curve]
+            self.canvas.itemconfigure(items["line"], fill=colors[curve])
+            for item in items["points"]:
+                self.canvas.itemconfigure(item, fill=colors[curve])
+
+    def set_data(self, cpu_data=None, gpu_data=None):
+        """设置数据时强制维度校验（不可编辑时忽略）"""
+        if not self.editable:
+            return
+        if isinstance(cpu_data, list) and len(cpu_data) == 10:
+            self._cpu_speed = [0 if i == 0 else max(0, min(int(round(val)), 100))
+                               for i, val in enumerate(cpu_data)]
+        if isinstance(gpu_data, list) and len(gpu_data) == 10:
+            self._gpu_speed = [0 if i == 0 else max(0, min(int(round(val)), 100))
+                               for i, val in enumerate(gpu_data)]
+        self.update_plot_data()
+        self._trigger_data_change()
+
+    def _trigger_data_change(self):
+        if self.on_data_change:
+            applied_cpu_curve = {i * 10: self.cpu_data[i] for i in range(10)}
+            applied_gpu_curve = {i * 10: self.gpu_data[i] for i in range(10)}
+            self.after_idle(lambda: self.on_data_change(applied_cpu_curve, applied_gpu_curve))
+
+    def update_plot_data(self):
+        """数据校验后更新两条曲线的画布坐标"""
+        self._cpu_speed = [0 if i == 0 else max(0, min(int(round(val)), 100)) for i, val in enumerate(self._cpu_speed)]
+        self._gpu_speed = [0 if i == 0 else max(0, min(int(round(val)), 100)) for i, val in enumerate(self._gpu_speed)]
+        for curve in ('cpu', 'gpu'):
+            self._update_curve(curve)
+
+    def _update_curve(self, curve):
+        px, py = self.areas[curve].to_px(self.fixed_temps, self._speeds(curve))
+        items = self._items[curve]
+        self.canvas.coords(items["line"], *np.column_stack((px, py)).ravel())
+        r = self.point_radius
+        for item, x, y in zip(items["points"], px, py):
+            self.canvas.coords(item, x - r, y - r, x + r, y + r)
+        self._update_selection(curve, px, py)
+
+    def _update_selection(self, curve, px=None, py=None):
+        """按选中状态显示/隐藏控制点外的高亮环"""
+        if px is None:
+            px, py = self.areas[curve].to_px(self.fixed_temps, self._speeds(curve))
+        r = self.point_radius + 3
+        mask = self.selected[self.curves.index(curve)]
+        for item, x, y, selected in zip(self._items[curve]["selection"], px, py, mask):
+            if selected:
+                self.canvas.coords(item, x - r, y - r, x + r, y + r)
+            self.canvas.itemconfigure(item, state="normal" if selected else "hidden")
+
+    def _points_px(self):
+        """两条曲线全部控制点的像素坐标，形状 (曲线, 点, 2)"""
+        return np.stack([
+            np.column_stack(self.areas[curve].to_px(self.fixed_temps, self._speeds(curve)))
+            for curve in self.curves
+        ])
+
+    def clear_selection(self):
+        """取消选中并结束进行中的拖拽/框选"""
+        self._gesture = None
+        self.selected[:] = False
+        self.canvas.itemconfigure("selection", state="hidden")
+
+    def set_operating_points(self, cpu_points=None, gpu_points=None):
+        """
+        更新实时工作点覆盖层
+        :param cpu_points: [(温度, 转速%), ...]，按时间从旧到新，最后一个为当前工作点；None表示不更新
+        :param gpu_points: 同上
+        """
+        for curve, points in (('cpu', cpu_points), ('gpu', gpu_points)):
+            if points is None:
+                continue
+            points = np.asarray(points, dtype=float).reshape(-1, 2)
+            self._trail_points[curve] = np.clip(points[~np.isnan(points).any(axis=1)], 0, 100)
+        if self.winfo_viewable():
+            self._render_overlay()
+
+    def _render_overlay(self):
+        for curve in ('cpu', 'gpu'):
+            items = self._items[curve]
+            points = self._trail_points[curve][-(self.trail_length + 1):]
+            px, py = self.areas[curve].to_px(points[:, 0], points[:, 1])
+            history = len(points) - 1
+            # 越早的点颜色越接近背景（模拟渐隐）
+            alphas = np.linspace(0.05, 0.5, history) if history > 0 else []
+            for i, item in enumerate(items["trail"]):
+                if i < history:
+                    self.canvas.coords(item, px[i] - 2.5, py[i] - 2.5, px[i] + 2.5, py[i] + 2.5)
+                    self.canvas.itemconfigure(item, fill=blend(self.overlay_color, alphas[i]), state="normal")
+                else:
+                    self.canvas.itemconfigure(item, state="hidden")
+            if len(points):
+                x, y = px[-1], py[-1]
+                self.canvas.coords(items["current"], x - 6, y - 6, x + 6, y + 6)
+                self.canvas.itemconfigure(items["current"], state="normal")
+            else:
+                self.canvas.itemconfigure(items["current"], state="hidden")
+        self.canvas.tag_raise("overlay")
+
+    def _bind_events(self):
+        self.canvas.bind('<ButtonPress-1>', self._on_mouse_press)
+        self.canvas.bind('<B1-Motion>', self._on_mouse_move)
+        self.canvas.bind('<ButtonRelease-1>', self._on_mouse_release)
+        self.canvas.bind('<Enter>', lambda e: self.canvas.config(cursor="hand2" if self.editable else "arrow"))
+        self.canvas.bind('<Leave>', lambda e: self.canvas.config(cursor="arrow"))
+
+    def _on_mouse_press(self, event):
+        """
+        像素空间命中测试：点中控制点开始拖动全部选中点，点在空白处开始框选（按住shift追加选择）
+        """
+        if not self.editable:
+            return
+        curve = next((c for c in self.curves if self.areas[c].contains(event.x, event.y)), None)
+        if curve is None:
+            return
+
+        self._press_curve = curve
+        self._press_xy = (event.x, event.y)
+        extend = bool(event.state & SHIFT_MASK)
+
+        hit = hit_test(self._points_px(), event.x, event.y, self.detect_radius, self._selectable)
+        if hit is not None:
+            if not self.selected[hit]:
+                if not extend:
+                    self.selected[:] = False
+                self.selected[hit] = True
+            self._gesture = 'drag'
+            self._origin = np.array([self._cpu_speed, self._gpu_speed])
+        else:
+            self._base_selection = self.selected.copy() if extend else np.zeros_like(self.selected)
+            self.selected = self._base_selection.copy()
+            self._gesture = 'box'
+            self.canvas.coords(self._box, event.x, event.y, event.x, event.y)
+            self.canvas.itemconfigure(self._box, state="normal")
+            self.canvas.tag_raise(self._box)
+        for c in self.curves:
+            self._update_selection(c)
+
+    def _on_mouse_move(self, event):
+        """拖动时整体平移选中点，只修改有变化的曲线；框选时更新选框和选中集合"""
+        if not self.editable or self._gesture is None:
+            return
+        area = self.areas[self._press_curve]
+        if self._gesture == 'drag':
+            delta = area.to_data(event.x, event.y)[1] - area.to_data(*self._press_xy)[1]
+            speeds = shift_points(self._origin, self.selected, delta)
+            for i, curve in enumerate(self.curves):
+                values = speeds[i].tolist()
+                if values != self._speeds(curve):
+                    if curve == 'cpu':
+                        self._cpu_speed = values
+                    else:
+                        self._gpu_speed = values
+                    self._update_curve(curve)
+        else:
+            # 框选只作用于按下时所在的坐标区域
+            inside = points_in_box(self._points_px(), *self._press_xy, event.x, event.y) & self._selectable
+            inside[[curve != self._press_curve for curve in self.curves]] = False
+            self.selected = self._base_selection | inside
+            self.canvas.coords(self._box, *self._press_xy, event.x, event.y)
+            for curve in self.curves:
+                self._update_selection(curve)
+
+    def _on_mouse_release(self, event):
+        """结束拖动/框选；一次拖动只触发一次数据回调"""
+        if not self.editable or self._gesture is None:
+            return
+        gesture, self._gesture = self._gesture, None
+        if gesture == 'box':
+            self.canvas.itemconfigure(self._box, state="hidden")
+        elif (np.array([self._cpu_speed, self._gpu_speed]) != self._origin).any():
+            self._trigger_data_change()
+        self._origin = None
+        self._base_selection = None
+
+
+class TkTelemetryChartWidget(tk.Frame):
+    """
+    纯Tk画布实现的温度/转速历史滚动图（不依赖matplotlib），接口与 TelemetryChartWidget 一致
+    每次刷新只修改四条折线的坐标；窗口隐藏到托盘时只做低频检查，不做绘制
+    :param telemetry: TelemetryRingBuffer 实例
+    :param minutes: 显示最近多少分钟
+    :param max_fps: 最大刷新帧率
+    """
+
+    def __init__(self, master=None, telemetry=None, minutes=10, max_fps=2, width=700, height=240, **kwargs):
+        super().__init__(master, **kwargs)
+        self.telemetry = telemetry
+        self.minutes = minutes
+        self.interval_ms = int(1000 / max_fps)
+        self.hidden_interval_ms = 2000
+        self.colors = dict(NORMAL_COLORS)
+
+        self.canvas = tk.Canvas(self, width=width, height=height, bg=BACKGROUND, highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.areas = {
+            'temp': _PlotArea(self.canvas, (-minutes, 0), (20, 100)),
+            'rpm': _PlotArea(self.canvas, (-minutes, 0), (0, 6500)),
+        }
+        self.ylabels = {'temp': "温度 (℃)", 'rpm': "转速 (转)"}
+        self.lines = {}  # (区域, cpu/gpu) -> 折线
+        for area in self.areas:
+            for name in ('cpu', 'gpu'):
+                self.lines[area, name] = self.canvas.create_line(0, 0, 0, 0, fill=self.colors[name], width=1.5,
+                                                                 state="hidden", tags="series")
+
+        self._last_count = -1
+        self._job = None
+        self.canvas.bind('<Configure>', self._on_configure)
+        # withdraw/deiconify 不一定触发子控件的 Map/Unmap，隐藏状态由 _tick 自行低频检查
+        self.bind('<Map>', lambda e: self.start())
+
+    def _on_configure(self, event=None):
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        half = width / 2
+        for i, area in enumerate(('temp', 'rpm')):
+            self.areas[area].place(i * half + 56, 12, half - 66, height - 52)
+        self._draw_static()
+        self.refresh(force=True)
+
+    def _draw_static(self):
+        self.canvas.delete("static")
+        xticks = list(range(-self.minutes, 1, max(1, self.minutes // 5)))
+        for area, plot in self.areas.items():
+            low, high = plot.ylim
+            step = max(1, int((high - low) / 4))
+            plot.draw_frame(self.colors, "", "时间 (分钟)", self.ylabels[area], xticks,
+                            list(range(int(low), int(high) + 1, step)), "static", dash=(2, 4))
+        # 图例
+        plot = self.areas['temp']
+        for i, name in enumerate(('cpu', 'gpu')):
+            y = plot.top + 10 + i * 14
+            self.canvas.create_line(plot.left + 8, y, plot.left + 24, y, fill=self.colors[name], width=1.5,
+                                    tags="static")
+            self.canvas.create_text(plot.left + 28, y, text=name.upper(), anchor="w", font=("SimHei", 8),
+                                    fill=self.colors['text'], tags="static")
+        self.canvas.tag_lower("static")
+
+    def start(self):
+        """开始定时刷新（已在低频检查时立即切回正常帧率）"""
+        if self._job is not None:
+            self.after_cancel(self._job)
+        self._last_count = -1
+        self._job = self.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        """停止定时刷新（控件销毁前调用）"""
+        if self._job is not None:
+            self.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self):
+        self._job = None
+        if not self.winfo_viewable():
+            # 隐藏时不绘制，但保持低频检查，恢复显示后自动继续刷新
+            self._job = self.after(self.hidden_interval_ms, self._tick)
+            return
+        self.refresh()
+        self._job = self.after(self.interval_ms, self._tick)
+
+    def refresh(self, force=False):
+        """有新数据时更新折线坐标"""
+        if self.telemetry is None:
+            return
+        count = self.telemetry.count
+        if count == self._last_count and not force:
+            return
+        self._last_count = count
+
+        snap = self.telemetry.snapshot(seconds=self.minutes * 60)
+        if len(snap["time"]) < 2:
+            return
+        x = (snap["time"] - snap["time"][-1]) / 60
+
+        # 超出纵轴范围时扩展并重画静态内容（很少发生）
+        expanded = False
+        for area, columns in (('temp', ("cpu_temp", "gpu_temp")), ('rpm', ("cpu_rpm", "gpu_rpm"))):
+            peak = max(float(np.nanmax(snap[c])) for c in columns)
+            low, high = self.areas[area].ylim
+            if peak > high:
+                self.areas[area].ylim = (low, peak * 1.1)
+                expanded = True
+        if expanded:
+            self._draw_static()
+
+        for (area, name), item in self.lines.items():
+            column = f"{name}_{area}"
+            px, py = self.areas[area].to_px(x, snap[column])
+            self.canvas.coords(item, *np.column_stack((px, py)).ravel())
+            self.canvas.itemconfigure(item, state="normal")
@@ -3,9 +3,6 @@ import time
 import clr
 from tkinter import ttk, messagebox, filedialog
 import logging
-from logging.handlers import RotatingFileHandler
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from datetime import datetime
 from tkinter import PhotoImage
 import tkinter as tk
@@ -19,12 +16,36 @@ import sys
 from Task import Task
 import ColorUtils
 from ColorUtilsPlus import *
-from CurveUtils import FanCurveWidget
 import math
+import atexit
+import io
+import numpy as np
+import platform
+import shutil
 from BackgroundUtils import BackgroundImageComponent
-
-plt.rcParams['font.sans-serif'] = ["SimHei"]  # 设置字体为黑体
-plt.rcParams['axes.unicode_minus'] = False  # 正常显示负号
+from LogUtils import (DropQueueHandler, DropReportingListener, MonitorLogPolicy, DailyRotatingFileHandler,
+                      LogRetentionManager, LogTailFollower, TaggedFormatter, get_log_file, list_log_segments,
+                      ordered_log_segments, export_log_timeline, MODE_CHANGE)
+from LogViewerUtils import VirtualLogView, LogFilterBar, LogSearch
+from TelemetryUtils import TelemetryWriter, TelemetryRingBuffer, LatencyStats
+from HistoryUtils import HistoryStore
+from DiagnosticsUtils import DiagnosticsBundle
+from LightUtils import (LightingEffectEngine, LightingService, TemperatureLighting, DEFAULT_TEMP_LIGHT,
+                        LIGHT_LEVELS, KEYBOARD_REGION, LED_REGION)
+
+
+def load_chart_widgets(renderer):
+    """
+    按配置选择曲线编辑器和历史图的实现
+    :param renderer: "tk" 使用纯Tk画布实现（不导入matplotlib），其余使用matplotlib实现
+    :return: (曲线编辑组件类, 历史图组件类)
+    """
+    if renderer == "tk":
+        from TkChartUtils import TkFanCurveWidget, TkTelemetryChartWidget
+        return TkFanCurveWidget, TkTelemetryChartWidget
+    from CurveUtils import FanCurveWidget
+    from ChartUtils import TelemetryChartWidget
+    return FanCurveWidget, TelemetryChartWidget
 
 
 def get_resource_path(relative_path):
@@ -84,6 +105,16 @@ class FanController:
         self.current_fan_mode = "auto"  # 当前风扇模式（auto/manual）
         self.speed_conversion = 63  # 百分比转原始值系数（0-100% → 0-6300）
         self.current_perf_mode = "未知"  # 当前系统性能模式
+        self.current_perf_code = -1  # 当前系统性能模式代码
+        self.current_gpu_mode = -1  # 当前显卡模式代码（需重启生效，运行期间基本不变）
+        self.last_cpu_target = None  # 最近一次下发的CPU目标转速（原始值）
+        self.last_gpu_target = None  # 最近一次下发的GPU目标转速（原始值）
+        self.telemetry = TelemetryRingBuffer(capacity=3600)  # 最近1小时的监控采样（供图表/托盘/诊断读取）
+        self.latency = LatencyStats()  # 硬件调用耗时统计（写入诊断包）
+        # 硬件写入锁：风扇控制阻塞获取；软件灯效非阻塞获取，锁被占用时跳过本次写入
+        self.hw_lock = threading.Lock()
+        self.lighting = LightingService(self.mcu, self.hw_lock, self.latency)  # 灯光写入统一入口（缓存各区域状态）
+        self.light_engine = LightingEffectEngine(self.write_light_frame, self.hw_lock, self.latency)
         self.applied_cpu_curve = {}  # 应用中的CPU风扇曲线
         self.applied_gpu_curve = {}  # 应用中的GPU风扇曲线
         self.is_custom_mode = False  # 是否启用自定义模式
@@ -95,6 +126,8 @@ class FanController:
         self.win_lock = None
         self.auto_close_light = None
         self.charging_mode = None
+        self.temp_light = dict(DEFAULT_TEMP_LIGHT)  # 温度联动灯光配置
+        self.temp_lighting = None  # 开启时为 TemperatureLighting 实例
 
         # 性能模式映射（code: name）
         self.perf_mode_map = {
@@ -124,6 +157,11 @@ class FanController:
         except Exception as e:
             logging.error(f"获取强冷模式状态失败: {str(e)}")
 
+        try:
+            self.current_gpu_mode = self.wmi.GetGPUMode()
+        except Exception as e:
+            logging.error(f"获取显卡模式失败: {str(e)}")
+
     def _load_default_config(self):
         """加载默认风扇曲线配置（0-90度，每10度一个控制点）"""
         # 默认CPU风扇曲线（0-90度对应的转速百分比）
@@ -155,6 +193,7 @@ class FanController:
             "WinLock": self.win_lock,
             "AutoCloseLight": self.auto_close_light,
             "ChargingMode": self.charging_mode,
+            "TempLight": self.temp_light,
         }
 
         try:
@@ -196,6 +235,7 @@ class FanController:
             self.win_lock = config.get("WinLock", False)
             self.auto_close_light = config.get("AutoCloseLight", False)
             self.charging_mode = config.get("ChargingMode", "最大电池电量")
+            self.temp_light = {**DEFAULT_TEMP_LIGHT, **config.get("TempLight", {})}
 
             # 转换为温度-转速字典
             self.applied_cpu_curve = {i * 10: self.cpu_fans[i] for i in range(10)}
@@ -211,11 +251,9 @@ class FanController:
                 self.wmi.FanControlOpen(self.is_custom_mode)
 
             self.win32.SetWinkeyLock(not self.win_lock)
-            self.controller.mcu.AutoCloselight(self.auto_close_light)
-            kmode, kcolor, klight = self.keyboard
-            self.light_switch(1, kmode, kcolor, klight)
-            amode, acolor, alight = self.led
-            self.light_switch(0, amode, acolor, alight)
+            self.mcu.AutoCloselight(self.auto_close_light)
+            self.apply_lights(self.keyboard, self.led)
+            self.set_temperature_lighting(self.temp_light["Enabled"])
 
             return True, file_path
         except Exception as e:
@@ -224,7 +262,9 @@ class FanController:
     def query_current_mode(self):
         """查询当前系统性能模式"""
         try:
-            mode_code = self.wmi.GetPerformanceMode()
+            with self.latency.measure("GetPerformanceMode"):
+                mode_code = self.wmi.GetPerformanceMode()
+            self.current_perf_code = mode_code
             self.current_perf_mode = self.perf_mode_map.get(mode_code, f"未知模式({mode_code})")
             return self.current_perf_mode, mode_code
         except Exception as e:
@@ -289,7 +329,7 @@ class FanController:
                     self.is_custom_mode = False
 
             self.save_config()  # 保存状态
-            logging.info(f"强冷模式已{'启用' if enable else '禁用'}")
+            logging.info(f"强冷模式已{'启用' if enable else '禁用'}", extra=MODE_CHANGE)
             return True
         except Exception as e:
             logging.error(f"切换强冷模式失败: {str(e)}")
@@ -298,20 +338,22 @@ class FanController:
     def get_temperatures(self):
         """获取CPU和GPU温度（℃）"""
         try:
-            return {
-                "cpu": round(float(self.wmi.GetCPUTem()), 1),
-                "gpu": round(float(self.wmi.GetGPUTem()), 1)
-            }
+            with self.latency.measure("GetTemperatures"):
+                return {
+                    "cpu": round(float(self.wmi.GetCPUTem()), 1),
+                    "gpu": round(float(self.wmi.GetGPUTem()), 1)
+                }
         except Exception as e:
             raise Exception(f"获取温度失败：{str(e)}")
 
     def get_fan_speeds(self):
         """获取CPU和GPU风扇转速（转/分）"""
         try:
-            return {
-                "cpu": self.wmi.GetCpufanSpeed(),
-                "gpu": self.wmi.GetGpufanSpeed()
-            }
+            with self.latency.measure("GetFanSpeeds"):
+                return {
+                    "cpu": self.wmi.GetCpufanSpeed(),
+                    "gpu": self.wmi.GetGpufanSpeed()
+                }
         except Exception as e:
             raise Exception(f"获取风扇转速失败：{str(e)}")
 
@@ -374,7 +416,9 @@ class FanController:
             # 限制转速范围（0-6300）
             cpu_clamped = max(0, min(6300, cpu_speed))
             gpu_clamped = max(0, min(6300, gpu_speed))
-            self.wmi.SetFanSpeed(cpu_clamped, gpu_clamped)
+            with self.hw_lock, self.latency.measure("SetFanSpeed"):
+                self.wmi.SetFanSpeed(cpu_clamped, gpu_clamped)
+            self.last_cpu_target, self.last_gpu_target = cpu_clamped, gpu_clamped
             return True
         except Exception as e:
             raise Exception(f"设置风扇转速失败：{str(e)}")
@@ -386,7 +430,8 @@ class FanController:
 
         cpu_temp, gpu_temp = temps["cpu"], temps["gpu"]
 
-        if self.wmi.GetGPUMode() == 3:
+        self.current_gpu_mode = self.wmi.GetGPUMode()
+        if self.current_gpu_mode == 3:
             gpu_temp = cpu_temp
 
         is_low_temp = (cpu_temp < self.low_temp_threshold) and (gpu_temp < self.low_temp_threshold)
@@ -396,7 +441,8 @@ class FanController:
         # 低温时自动切换到自动模式
         if is_low_temp:
             if self.current_fan_mode != "auto":
-                self.wmi.FanControlOpen(False)
+                with self.hw_lock:
+                    self.wmi.FanControlOpen(False)
                 self.current_fan_mode = "auto"
                 self.is_custom_mode = True
                 self.last_non_full_mode = "auto"
@@ -405,7 +451,8 @@ class FanController:
         # 高温时使用自定义曲线
         else:
             if self.current_fan_mode != "manual":
-                self.wmi.FanControlOpen(True)
+                with self.hw_lock:
+                    self.wmi.FanControlOpen(True)
                 self.current_fan_mode = "manual"
                 self.is_custom_mode = True
                 self.last_non_full_mode = "manual"
@@ -422,62 +469,78 @@ class FanController:
 
         return log_msg, mode_changed
 
+    def get_fan_mode_code(self):
+        """当前实际风扇模式（auto/manual/full），低温自动切换时视为auto"""
+        if self.is_full_mode:
+            return "full"
+        if self.is_custom_mode and self.current_fan_mode == "manual":
+            return "manual"
+        return "auto"
+
     def restore_default_mode(self):
         """程序退出时恢复默认风扇模式"""
         try:
-            self.wmi.FanControlOpen(False)  # 关闭自定义
-            self.wmi.SetFanFullMode(False)  # 关闭强冷
+            self.light_engine.stop()  # 停止软件灯效
+            if self.temp_lighting is not None:
+                self.temp_lighting.stop()  # 停止温度联动灯光
+            with self.hw_lock:
+                self.wmi.FanControlOpen(False)  # 关闭自定义
+                self.wmi.SetFanFullMode(False)  # 关闭强冷
             self.current_fan_mode = "auto"
             self.is_custom_mode = False
             self.is_full_mode = False
         except Exception as e:
             logging.warning(f"恢复默认模式失败: {str(e)}")
 
-    def light_switch(self, region, mode, color, light):
-        level = {
-            "亮度0": 0,
-            "亮度1": int(255 / 4),
-            "亮度2": int(255 / 3),
-            "亮度3": int(255 / 2),
-            "亮度4": int(255 / 1),
-        }
-        command = {
-            "关闭": 0,
-            "打开": 1,
-            "常亮": 2,
-            "呼吸": 3,
-            "渐变": 4
-        }
-        r, g, b = ColorUtils.Color[color]
+    @staticmethod
+    def light_rgb(color):
+        """灯光颜色转 (R, G, B)：支持颜色名（ColorUtils.Color）和 #RRGGBB"""
+        if color in ColorUtils.Color:
+            return ColorUtils.Color[color]
+        return ColorConverter.tk_color_to_rgb(color)
 
-        if mode == "关闭":
-            self.mcu.LightSwitch(region, command[mode], r, g, b, level[light])
-        else:
-            self.mcu.LightSwitch(region, command["打开"], r, g, b, level[light])
-            self.mcu.LightSwitch(region, command[mode], r, g, b, level[light])
-
-    def light_switch_plus(self, region, mode, color, light):
-        level = {
-            "亮度0": 0,
-            "亮度1": int(255 / 4),
-            "亮度2": int(255 / 3),
-            "亮度3": int(255 / 2),
-            "亮度4": int(255 / 1),
-        }
-        command = {
-            "关闭": 0,
-            "打开": 1,
-            "常亮": 2,
-            "呼吸": 3,
-            "渐变": 4
-        }
-        r, g, b = ColorConverter.tk_color_to_rgb(color)
+    def apply_lights(self, keyboard=None, led=None):
+        """
+        应用键盘/氛围灯预设（[模式, 颜色, 亮度]，None表示不修改），多个区域作为一个事务写入
+        与上次写入相同的区域不发送
+        """
+        updates = {}
+        for region, setting in ((KEYBOARD_REGION, keyboard), (LED_REGION, led)):
+            if setting is None:
+                continue
+            mode, color, light = setting
+            # 固件预设接管该区域，停止软件灯效
+            self.light_engine.clear(region)
+            updates[region] = (mode, self.light_rgb(color), light)
+        return self.lighting.apply(updates)
 
-        if mode == "关闭":
-            self.mcu.LightSwitch(region, command[mode], r, g, b, level[light])
-        else:
-            self.mcu.LightSwitch(region, command["打开"], r, g, b, level[light])
-            self.mcu.LightSwitch(region, command[mode], r, g, b, level[light])
+    def light_switch(self, region, mode, color, light):
+        """设置单个区域的预设"""
+        self.light_engine.clear(region)
+        return self.lighting.apply({region: (mode, self.light_rgb(color), light)})
+
+    def set_temperature_lighting(self, enabled):
+        """开启/关闭温度联动灯光（键盘、氛围灯颜色跟随温度）；关闭时恢复两者的预设"""
+        self.temp_light["Enabled"] = enabled
+        if enabled:
+            self.light_engine.clear()
+            if self.temp_lighting is not None:
+                self.temp_lighting.stop()
+            self.temp_lighting = TemperatureLighting.from_config(self.temp_light, self.write_light_frame, self.hw_lock)
+            self.temp_lighting.start()
+        elif self.temp_lighting is not None:
+            self.temp_lighting.stop()
+            self.temp_lighting = None
+            self.apply_lights(self.keyboard, self.led)
+
+    def write_light_frame(self, region, rgb):
+        """
+        软件灯效写入一帧颜色（常亮模式），由灯效引擎/温度联动在持有硬件锁时调用
+        亮度沿用该区域的设置；区域已打开时只发送颜色
+        """
+        setting = self.keyboard if region == KEYBOARD_REGION else self.led
+        light = setting[2] if setting and setting[2] in LIGHT_LEVELS else "亮度4"
+        self.lighting.apply_locked({region: ("常亮", rgb, light)})
 
 
 class FanCurveGUI:
@@ -493,11 +556,18 @@ class FanCurveGUI:
         self.is_monitoring = False  # 监控状态标记
         self.log_window = None  # 日志窗口引用
         self.log_refresh_active = False  # 日志刷新状态
+        self.log_refresh_job = None
+        self.log_search = None  # 正在进行的日志搜索
+        self.log_filter_bar = None
+        self.log_follower = LogTailFollower()  # 当前日志增量读取
+        self.log_max_lines = 5000  # 日志窗口最多保留的行数
+        self.log_segment_var = None
         self.more_setting_refresh_active = False
         self.gpu_var = None
         self.kl_color_widget = None
         self.keyboard_light_var = None
         self.kl_auto_off_var = None
+        self.temp_light_var = None
         self.kl_color_var = None
         self.kl_bright_var = None
         self.al_color_widget = None
@@ -519,6 +589,10 @@ class FanCurveGUI:
         self.setting_config = configparser.ConfigParser()
         self.bg_image_path = None
         self.bg_transparency = None
+        self.curve_renderer = "matplotlib"  # 曲线/历史图实现：matplotlib 或 tk
+        self.telemetry_writer = TelemetryWriter(get_file_path("logs", "telemetry"))
+        self.history_store = HistoryStore(get_file_path("logs", "history.db"))
+        self.history_store.start()
 
         # 模式映射（UI显示文本 → 内部模式代码）
         self.fan_mode_mapping = {
@@ -562,6 +636,7 @@ class FanCurveGUI:
         self.edit_gpu_curve = self.controller.applied_gpu_curve.copy()
 
         # 加载配置文件
+        self.log_policy = MonitorLogPolicy()
         self.load_setting_config()
 
         # 初始化界面
@@ -743,8 +818,9 @@ class FanCurveGUI:
         ctrl_frame = ttk.Frame(config_card, padding=(15, 0))  # 右侧内边距
         ctrl_frame.pack(side="left", fill="both", expand=True)  # 纵向占满，不扩展宽度
 
-        # 创建组件
-        self.curve_widget = FanCurveWidget(curve_frame, cpu_data=self.edit_cpu_curve, gpu_data=self.edit_gpu_curve)
+        # 创建组件（实现由配置 curve_renderer 决定）
+        curve_widget_class, chart_widget_class = load_chart_widgets(self.curve_renderer)
+        self.curve_widget = curve_widget_class(curve_frame, cpu_data=self.edit_cpu_curve, gpu_data=self.edit_gpu_curve)
         self.curve_widget.pack(side="left", expand=False, padx=8, pady=8)
         self.curve_widget.on_data_change = self.on_data_change
 
@@ -855,6 +931,12 @@ class FanCurveGUI:
 
         ttk.Separator(ctrl_frame, orient="horizontal").pack(fill="x", pady=15)
 
+        # 曲线下方：温度/转速历史图（读取控制器遥测缓冲，不额外查询硬件）
+        history_card = ttk.LabelFrame(content_frame, text="温度/转速历史（最近10分钟）", padding="10 10 10 10")
+        history_card.pack(side="top", fill="both", expand=True, padx=(0, 10), pady=(10, 0))
+        self.history_chart = chart_widget_class(history_card, telemetry=self.controller.telemetry, minutes=10)
+        self.history_chart.pack(fill="both", expand=True)
+
         # 右侧：曲线预览卡片
         # plot_card = ttk.LabelFrame(content_frame, text="曲线预览", padding="10 10 10 10")
         # plot_card.pack(side="right", fill="both", expand=True, padx=(10, 0))
@@ -868,6 +950,8 @@ class FanCurveGUI:
 
         ttk.Button(footer_frame, text="查看日志", command=self.view_current_log, style="Custom.TButton").pack(
             side="right", padx=5)
+        ttk.Button(footer_frame, text="导出诊断包", command=self.export_diagnostics,
+                   style="Custom.TButton").pack(side="right", padx=5)
         # ttk.Button(footer_frame, text="保存日志副本", command=self.save_log, style="Custom.TButton").pack(side="right",
         #                                                                                                   padx=5)
 
@@ -1027,6 +1111,13 @@ class FanCurveGUI:
             self.bg_transparency = self.setting_config.getfloat('Settings', 'bg_transparency', fallback=0.8)
             bg_image_path = "./asset/background.png"
             self.bg_image_path = self.setting_config.get('Settings', 'bg_image_path', fallback=bg_image_path)
+            self.curve_renderer = self.setting_config.get('Settings', 'curve_renderer', fallback="matplotlib")
+            # 监控日志策略：常规状态采样间隔、温度/转速突变阈值
+            self.log_policy = MonitorLogPolicy(
+                sample_interval=self.setting_config.getint('Settings', 'log_sample_interval', fallback=60),
+                temp_delta=self.setting_config.getfloat('Settings', 'log_temp_delta', fallback=3.0),
+                rpm_delta=self.setting_config.getint('Settings', 'log_rpm_delta', fallback=500),
+            )
 
     def save_setting_config(self):
         """保存启动配置"""
@@ -1228,7 +1319,7 @@ class FanCurveGUI:
             for btn_name, btn in self.sys_mode_buttons.items():
                 btn.config(style="Accent.TButton" if btn_name == mode_name else "TButton")
             self.update_status_text()
-            self.logger.info(f"当前系统模式：{mode_name}")
+            self.logger.info(f"当前系统模式：{mode_name}", extra=MODE_CHANGE)
             return True
         except Exception as e:
             error_msg = f"查询模式失败：{str(e)}"
@@ -1254,7 +1345,7 @@ class FanCurveGUI:
 
             # 检测状态变化并记录日志
             if current_perf != self.last_perf_mode or current_fan != self.last_fan_mode:
-                self.logger.info(f"状态更新：{current_perf} | {current_fan}")
+                self.logger.info(f"状态更新：{current_perf} | {current_fan}", extra=MODE_CHANGE)
                 self.last_perf_mode = current_perf
                 self.last_fan_mode = current_fan
 
@@ -1267,7 +1358,7 @@ class FanCurveGUI:
         try:
             result = self.controller.set_system_perf_mode(mode_name)
             if self._query_current_mode():
-                self.logger.info(f"切换至{mode_name}成功")
+                self.logger.info(f"切换至{mode_name}成功", extra=MODE_CHANGE)
         except Exception as e:
             error_msg = f"切换{mode_name}失败：{str(e)}"
             self.logger.error(error_msg)
@@ -1312,7 +1403,7 @@ class FanCurveGUI:
         else:
             self.controller.same_speed = False
 
-        logging.info(f"风扇同速模式：{'开' if target_enable else '关'}")
+        logging.info(f"风扇同速模式：{'开' if target_enable else '关'}", extra=MODE_CHANGE)
 
     def _on_full_mode_change(self):
         """处理强冷模式开/关切换"""
@@ -1393,16 +1484,29 @@ class FanCurveGUI:
                 self.root.after(0, self.update_status_text)
                 self.root.after(0, self._update_perf_mode_buttons)
 
-                # 生成日志
+                # 生成日志（参数延迟到写盘线程格式化）
+                perf_mode = self.controller.current_perf_mode
+                mode_changed = False
                 if self.controller.is_full_mode:
-                    log_msg = f"CPU: {temps['cpu']}℃ | GPU: {temps['gpu']}℃ | 强冷模式 | 系统模式：{self.controller.current_perf_mode}"
+                    log_fmt = "CPU: %s℃ | GPU: %s℃ | 强冷模式 | 系统模式：%s"
+                    log_args = (temps['cpu'], temps['gpu'], perf_mode)
                 elif self.controller.is_custom_mode:
-                    control_log, _ = self.controller.custom_fan_control(temps)
-                    log_msg = f"CPU: {temps['cpu']}℃ [{speeds['cpu']}转] | GPU: {temps['gpu']}℃ [{speeds['gpu']}转] | {control_log} | 系统模式：{self.controller.current_perf_mode}"
+                    control_log, mode_changed = self.controller.custom_fan_control(temps)
+                    log_fmt = "CPU: %s℃ [%s转] | GPU: %s℃ [%s转] | %s | 系统模式：%s"
+                    log_args = (temps['cpu'], speeds['cpu'], temps['gpu'], speeds['gpu'], control_log, perf_mode)
                 else:
-                    log_msg = f"CPU: {temps['cpu']}℃ 自动 [{speeds['cpu']}转] | GPU: {temps['gpu']}℃ 自动 [{speeds['gpu']}转] | 系统模式：{self.controller.current_perf_mode}"
+                    log_fmt = "CPU: %s℃ 自动 [%s转] | GPU: %s℃ 自动 [%s转] | 系统模式：%s"
+                    log_args = (temps['cpu'], speeds['cpu'], temps['gpu'], speeds['gpu'], perf_mode)
+                self._log_monitor_status(log_fmt, log_args, temps, speeds, mode_changed)
+
+                # 记录二进制遥测
+                self._record_telemetry(temps, speeds)
+                self.root.after(0, self._update_curve_overlay)
 
-                self.logger.info(log_msg)
+                # 温度联动灯光：只交出本次读取的温度，查表和写入在其工作线程中进行
+                temp_lighting = self.controller.temp_lighting
+                if temp_lighting is not None:
+                    temp_lighting.submit(temps)
 
             except Exception as e:
                 error_msg = f"监控错误：{str(e)}"
@@ -1412,6 +1516,49 @@ class FanCurveGUI:
             # 等待下一次监控
             time.sleep(self.controller.monitor_interval)
 
+    def _log_monitor_status(self, log_fmt, log_args, temps, speeds, transition):
+        """按日志策略决定是否记录本次监控状态（状态切换、数值突变立即记录，其余定时采样）"""
+        state = (self.controller.get_fan_mode_code(), self.controller.current_perf_mode)
+        values = (temps["cpu"], temps["gpu"], speeds["cpu"], speeds["gpu"])
+        if not self.log_policy.check(values, state, transition):
+            return
+        suppressed = self.log_policy.take_suppressed()
+        if suppressed:
+            log_fmt += " | 省略%s条"
+            log_args += (suppressed,)
+        # 阈值触发的风扇模式切换带模式切换标记
+        self.logger.info(log_fmt, *log_args, extra=MODE_CHANGE if transition else None)
+
+    def _record_telemetry(self, temps, speeds):
+        """追加一条遥测记录到内存缓冲和二进制日志（失败不影响风扇控制）"""
+        try:
+            fan_mode = self.controller.get_fan_mode_code()
+            is_manual = fan_mode == "manual"
+            cpu_target = self.controller.last_cpu_target if is_manual else None
+            gpu_target = self.controller.last_gpu_target if is_manual else None
+            self.controller.telemetry.append(temps["cpu"], temps["gpu"], speeds["cpu"], speeds["gpu"],
+                                             cpu_target, gpu_target)
+            self.telemetry_writer.append(
+                temps["cpu"], temps["gpu"], speeds["cpu"], speeds["gpu"], cpu_target, gpu_target,
+                fan_mode, self.controller.current_perf_code, self.controller.current_gpu_mode,
+            )
+            self.history_store.add(temps["cpu"], temps["gpu"], speeds["cpu"], speeds["gpu"])
+        except Exception as e:
+            self.logger.warning("写入遥测失败：%s", e)
+
+    def _update_curve_overlay(self):
+        """在曲线上标出实时工作点（数据取自遥测缓冲，不额外读取硬件）"""
+        if self.curve_widget is None or not self.root.winfo_viewable():
+            return
+        snap = self.controller.telemetry.snapshot(last_n=self.curve_widget.trail_length)
+        points = {}
+        for name in ("cpu", "gpu"):
+            # 自定义模式取下发的目标转速，其余模式取实际转速
+            target = snap[f"{name}_target"]
+            raw = np.where(np.isnan(target), snap[f"{name}_rpm"], target)
+            points[name] = np.column_stack((snap[f"{name}_temp"], raw / self.controller.speed_conversion))
+        self.curve_widget.set_operating_points(points["cpu"], points["gpu"])
+
     def _sync_full_mode_status(self):
         """同步强冷模式状态（处理外部修改）"""
         try:
@@ -1448,7 +1595,7 @@ class FanCurveGUI:
                 self.root.after(0, lambda: self._set_curve_editable(is_editable))
                 self.root.after(0, lambda: self._set_config_buttons_state(is_editable))
 
-                logging.info(f"强冷模式同步：{'开' if new_full_mode else '关'}")
+                logging.info(f"强冷模式同步：{'开' if new_full_mode else '关'}", extra=MODE_CHANGE)
         except Exception as e:
             logging.warning(f"同步强冷模式失败: {str(e)}")
 
@@ -1551,6 +1698,12 @@ class FanCurveGUI:
                                                 style="Custom.TCheckbutton", command=self.set_auto_close_light)
             kl_auto_off_check.pack(side="left", padx=10, pady=2)  # 与单选框保持小间距
 
+            # 温度联动（键盘和氛围灯颜色跟随CPU/GPU温度）
+            self.temp_light_var = tk.BooleanVar(value=self.controller.temp_light["Enabled"])
+            temp_light_check = ttk.Checkbutton(kl_top_frame, text="温度联动", variable=self.temp_light_var,
+                                               style="Custom.TCheckbutton", command=self.set_temperature_light)
+            temp_light_check.pack(side="left", padx=10, pady=2)
+
             # 第二行：颜色 + 亮度（换行，压缩宽度）
             kl_bottom_frame = ttk.Frame(keyboard_light_frame)
             kl_bottom_frame.pack(fill="x", padx=5, pady=10)
@@ -1821,8 +1974,12 @@ class FanCurveGUI:
         # 同步到控制器（更新为最新值）
         self.controller.led = [current_mode, current_color, current_light]
 
+        # 温度联动开启时颜色由温度决定，只保存设置，亮度在下次监控时生效
+        if self.controller.temp_lighting is not None:
+            self.controller.temp_lighting.reset()
+            return
         # 调用生效逻辑（此时传入的是最新值）
-        self.controller.light_switch_plus(1, current_mode, current_color, current_light)
+        self.controller.apply_lights(led=self.controller.led)
         self.logger.info(f"氛围灯设置生效：模式={current_mode}, 颜色={current_color}, 亮度={current_light}")
 
     def set_keyboard_light(self, *args):
@@ -1834,8 +1991,12 @@ class FanCurveGUI:
         # 同步到控制器（更新为最新值）
         self.controller.keyboard = [current_mode, current_color, current_light]
 
+        # 温度联动开启时颜色由温度决定，只保存设置，亮度在下次监控时生效
+        if self.controller.temp_lighting is not None:
+            self.controller.temp_lighting.reset()
+            return
         # 调用生效逻辑（此时传入的是最新值）
-        self.controller.light_switch_plus(0, current_mode, current_color, current_light)
+        self.controller.apply_lights(keyboard=self.controller.keyboard)
         self.logger.info(f"键盘灯设置生效：模式={current_mode}, 颜色={current_color}, 亮度={current_light}")
 
     def switch_win_lock(self):
@@ -1854,11 +2015,21 @@ class FanCurveGUI:
             self.controller.wmi.SetFnkeyLock(False)
             self.logger.info("更多设置：Fn键已关闭")
 
+    def set_temperature_light(self):
+        enabled = self.temp_light_var.get()
+        try:
+            self.controller.set_temperature_lighting(enabled)
+            self.logger.info(f"温度联动灯光已{'开启' if enabled else '关闭'}")
+        except Exception as e:
+            self.logger.error(f"切换温度联动灯光失败：{str(e)}")
+
     def set_auto_close_light(self):
         if self.kl_auto_off_var.get():
             self.controller.mcu.AutoCloselight(True)
         else:
             self.controller.mcu.AutoCloselight(False)
+        # 自动熄灯会由固件改变灯光，缓存的状态不再可靠
+        self.controller.lighting.invalidate()
 
     def start_more_setting_refresh(self):
         """启动日志刷新"""
@@ -1896,11 +2067,7 @@ class FanCurveGUI:
                 return
 
             # 获取日志文件路径
-            log_file = None
-            for handler in self.logger.handlers:
-                if isinstance(handler, RotatingFileHandler):
-                    log_file = handler.baseFilename
-                    break
+            log_file = get_log_file(self.logger)
 
             if not log_file or not os.path.exists(log_file):
                 raise Exception("日志文件不存在")
@@ -1921,14 +2088,39 @@ class FanCurveGUI:
             # 窗口关闭处理
             def on_close():
                 self.stop_log_refresh()
+                self.cancel_log_search()
                 self.log_window.destroy()
                 self.log_window = None
 
             self.log_window.protocol("WM_DELETE_WINDOW", on_close)
 
+            # 日志分段选择（当前日志、切分备份和压缩备份）
+            segment_frame = ttk.Frame(self.log_window)
+            segment_frame.pack(fill="x", padx=10, pady=(10, 0))
+            ttk.Label(segment_frame, text="日志文件：").pack(side="left")
+            self.log_follower.reset()
+            self.log_segment_var = tk.StringVar(value=os.path.basename(log_file))
+            segments = [os.path.basename(p) for p in reversed(list_log_segments(os.path.dirname(log_file)))]
+            segment_combo = ttk.Combobox(segment_frame, textvariable=self.log_segment_var, values=segments,
+                                         state="readonly", width=40)
+            segment_combo.bind("<<ComboboxSelected>>", self._on_log_segment_change)
+            segment_combo.pack(side="left", padx=5)
+            ttk.Button(segment_frame, text="打开日志文件...", command=self._choose_log_file,
+                       style="Custom.TButton").pack(side="left", padx=5)
+            ttk.Button(segment_frame, text="完整时间线", command=self.open_log_timeline,
+                       style="Custom.TButton").pack(side="left", padx=5)
+            ttk.Button(segment_frame, text="导出时间线...", command=self.export_log_timeline,
+                       style="Custom.TButton").pack(side="left", padx=5)
+
+            # 过滤栏（后台搜索，有过滤条件时暂停实时刷新）
+            self.log_filter_bar = LogFilterBar(self.log_window, on_change=self._on_log_filter_change,
+                                               on_cancel=self.cancel_log_search)
+            self.log_filter_bar.pack(fill="x", padx=10, pady=(10, 0))
+
             # 日志显示区域
-            log_frame = ttk.LabelFrame(self.log_window, text="日志内容（实时更新）", padding=10)
-            log_frame.pack(fill="both", expand=True, padx=10, pady=10)
+            self.log_frame = ttk.LabelFrame(self.log_window, text="日志内容（实时更新）", padding=10)
+            self.log_frame.pack(fill="both", expand=True, padx=10, pady=10)
+            log_frame = self.log_frame
 
             self.log_text = tk.Text(log_frame, wrap=tk.WORD, font=("Consolas", 13))
             self.log_text.pack(side="left", fill="both", expand=True)
@@ -1946,6 +2138,137 @@ class FanCurveGUI:
             self.logger.error(error_msg)
             messagebox.showerror("失败", error_msg)
 
+    def _on_log_segment_change(self, event=None):
+        """选择历史分段时在独立窗口中打开（当前日志窗口继续实时刷新）"""
+        log_file = get_log_file(self.logger)
+        selected = os.path.join(os.path.dirname(log_file), self.log_segment_var.get())
+        self.log_segment_var.set(os.path.basename(log_file))
+        if os.path.abspath(selected) != os.path.abspath(log_file):
+            self.open_log_viewer(selected)
+
+    def _choose_log_file(self):
+        """选择任意日志文件打开"""
+        log_file = get_log_file(self.logger)
+        file_path = filedialog.askopenfilename(
+            filetypes=[("日志文件", "*.txt *.gz *.txt.*"), ("所有文件", "*.*")],
+            initialdir=os.path.dirname(log_file) if log_file else None,
+            title="打开日志文件",
+            parent=self.log_window
+        )
+        if file_path:
+            self.open_log_viewer(file_path)
+
+    def open_log_viewer(self, path=None, source=None, title=None):
+        """在独立窗口中以虚拟化方式查看日志（内存映射+按需渲染，适合大文件）"""
+        try:
+            viewer_window = tk.Toplevel(self.root)
+            viewer_window.title(f"日志查看 - {title or os.path.basename(path)}")
+            viewer_window.geometry("1080x720")
+            viewer = VirtualLogView(viewer_window, path=path, source=source)
+            viewer.pack(fill="both", expand=True, padx=10, pady=10)
+        except Exception as e:
+            error_msg = f"打开日志失败：{str(e)}"
+            self.logger.error(error_msg)
+            messagebox.showerror("失败", error_msg)
+
+    def open_log_timeline(self):
+        """查看全部分段按时间合并后的完整日志（合并在索引线程中流式完成）"""
+        log_dir = os.path.dirname(get_log_file(self.logger))
+
+        def write_timeline(f):
+            out = io.TextIOWrapper(f, encoding="utf-8", newline="\n")
+            export_log_timeline(log_dir, out)
+            out.flush()
+            out.detach()  # 不随包装对象关闭底层临时文件
+
+        self.open_log_viewer(source=write_timeline, title="完整时间线")
+
+    def export_log_timeline(self):
+        """将全部分段按时间合并导出为单个文本文件（后台线程执行）"""
+        log_dir = os.path.dirname(get_log_file(self.logger))
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")],
+            initialfile=f"fan_log_timeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+            title="导出日志时间线",
+            parent=self.log_window
+        )
+        if not file_path:
+            return
+
+        def worker():
+            try:
+                with open(file_path, "w", encoding="utf-8") as f:
+                    count = export_log_timeline(log_dir, f)
+                self.logger.info("日志时间线已导出：%s（%s行）", file_path, count)
+                self.root.after(0, lambda: messagebox.showinfo("成功", f"已导出 {count} 行至：\n{file_path}"))
+            except Exception as e:
+                error_msg = f"导出日志时间线失败：{str(e)}"
+                self.logger.error(error_msg)
+                self.root.after(0, lambda: messagebox.showerror("失败", error_msg))
+
+        threading.Thread(target=worker, name="LogTimelineExport", daemon=True).start()
+
+    def _on_log_filter_change(self, log_filter):
+        """过滤条件变化：有条件时后台搜索并暂停实时刷新，清空条件后恢复实时日志"""
+        self.cancel_log_search()
+        if not self.log_window or not self.log_window.winfo_exists():
+            return
+        self.log_text.config(state="normal")
+        self.log_text.delete(1.0, tk.END)
+        self.log_text.config(state="disabled")
+
+        if log_filter is None:
+            self.log_frame.config(text="日志内容（实时更新）")
+            self.log_filter_bar.set_status("")
+            self.log_follower.reset()
+            self.refresh_log_content()
+            self.start_log_refresh()
+            return
+
+        self.stop_log_refresh()
+        log_file = get_log_file(self.logger)
+        if self.log_filter_bar.all_segments_var.get():
+            paths = ordered_log_segments(os.path.dirname(log_file))
+        else:
+            paths = [log_file]
+        self.log_frame.config(text="过滤结果")
+        self.log_search = LogSearch(paths, log_filter, max_results=self.log_max_lines)
+        self._poll_log_search(self.log_search)
+
+    def _poll_log_search(self, search):
+        """定时取回搜索结果批次并追加显示（搜索被替换或取消后停止）"""
+        if search is not self.log_search or not self.log_window or not self.log_window.winfo_exists():
+            return
+        lines = search.drain()
+        if lines:
+            self.log_text.config(state="normal")
+            self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+            self.log_text.config(state="disabled")
+
+        if search.error:
+            status = f"搜索失败：{search.error}"
+        elif search.cancelled:
+            status = f"已停止：匹配 {search.matched} 行"
+        elif search.finished:
+            status = f"完成：扫描 {search.scanned_lines} 行，匹配 {search.matched} 行"
+            if search.truncated:
+                status += f"（已达上限 {search.max_results} 行，请缩小条件）"
+        else:
+            name = os.path.basename(search.current_path or "")
+            status = f"搜索中 {name}：已扫描 {search.scanned_lines} 行，匹配 {search.matched} 行"
+        self.log_filter_bar.set_status(status)
+
+        if not search.finished and not search.cancelled:
+            self.root.after(100, self._poll_log_search, search)
+
+    def cancel_log_search(self):
+        """停止当前的后台搜索"""
+        if self.log_search is not None and not self.log_search.finished:
+            self.log_search.cancel()
+            if self.log_filter_bar and self.log_window and self.log_window.winfo_exists():
+                self.log_filter_bar.set_status(f"已停止：匹配 {self.log_search.matched} 行")
+
     def start_log_refresh(self):
         """启动日志刷新"""
         if not self.log_refresh_active:
@@ -1955,40 +2278,44 @@ class FanCurveGUI:
     def stop_log_refresh(self):
         """停止日志刷新"""
         self.log_refresh_active = False
+        if self.log_refresh_job is not None:
+            self.root.after_cancel(self.log_refresh_job)
+            self.log_refresh_job = None
 
     def log_refresh_loop(self):
         """日志刷新循环"""
+        self.log_refresh_job = None
         if self.log_refresh_active and self.log_window and self.log_window.winfo_exists():
             self.refresh_log_content()
-            self.root.after(500, self.log_refresh_loop)  # 500ms刷新一次
+            self.log_refresh_job = self.root.after(500, self.log_refresh_loop)  # 500ms刷新一次
 
     def refresh_log_content(self):
-        """刷新日志内容"""
+        """刷新日志内容（只追加新增的行）"""
         try:
             if not hasattr(self, 'log_text') or not self.log_window:
                 return
 
-            # 获取日志文件
-            log_file = None
-            for handler in self.logger.handlers:
-                if isinstance(handler, RotatingFileHandler):
-                    log_file = handler.baseFilename
-                    break
-
-            if not log_file or not os.path.exists(log_file):
+            log_file = get_log_file(self.logger)
+            if not log_file:
+                return
+            lines, resynced = self.log_follower.poll(log_file)
+            if not lines and not resynced:
                 return
 
             # 保存滚动位置
-            current_pos = self.log_text.yview()[1]
-            is_at_end = current_pos > 0.95
-
-            # 读取并显示日志
-            with open(log_file, "r", encoding="utf-8") as f:
-                content = f.read()
+            is_at_end = resynced or self.log_text.yview()[1] > 0.95
 
             self.log_text.config(state="normal")
-            self.log_text.delete(1.0, tk.END)
-            self.log_text.insert(tk.END, content)
+            if resynced:
+                self.log_text.delete(1.0, tk.END)
+            if lines:
+                self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+
+            # 限制最大行数（删除最早的行）
+            line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+            if line_count > self.log_max_lines:
+                self.log_text.delete("1.0", f"{line_count - self.log_max_lines + 1}.0")
+
             if is_at_end:
                 self.log_text.see(tk.END)
             self.log_text.config(state="disabled")
@@ -1999,24 +2326,15 @@ class FanCurveGUI:
     def save_log(self):
         """保存日志副本"""
         try:
-            log_file = None
-            for handler in self.logger.handlers:
-                if isinstance(handler, RotatingFileHandler):
-                    log_file = handler.baseFilename
-                    break
+            log_file = get_log_file(self.logger)
 
             if not log_file or not os.path.exists(log_file):
                 raise Exception("日志文件不存在")
 
-            # 读取日志内容
-            with open(log_file, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            # 保存为新文件
+            # 逐块复制为新文件（不整体读入内存）
             new_file = f"fan_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            new_path = get_file_path("logs", "new_file")
-            with open(new_path, "w", encoding="utf-8") as f:
-                f.write(content)
+            new_path = os.path.join(os.path.dirname(log_file), new_file)
+            shutil.copyfile(log_file, new_path)
 
             self.logger.info(f"日志已保存至：{new_file}")
             messagebox.showinfo("成功", f"日志副本已保存至：\n{new_path}")
@@ -2025,6 +2343,88 @@ class FanCurveGUI:
             self.logger.error(error_msg)
             messagebox.showerror("失败", error_msg)
 
+    def _collect_diagnostics(self):
+        """运行时诊断信息（硬件调用耗时、近期温度统计、当前模式等）"""
+        controller = self.controller
+        return {
+            "platform": platform.platform(),
+            "python": sys.version,
+            "fan_mode": controller.get_fan_mode_code(),
+            "perf_mode": controller.current_perf_mode,
+            "gpu_mode": controller.current_gpu_mode,
+            "hardware_latency": controller.latency.snapshot(),
+            "telemetry_stats": controller.telemetry.window_stats(),
+            "log_suppressed": self.log_policy.total_suppressed,
+            "history_dropped": self.history_store.dropped,
+            "light_engine": dict(controller.light_engine.stats, fps=controller.light_engine.fps),
+        }
+
+    def export_diagnostics(self):
+        """导出诊断包（全部日志分段、配置、近期遥测、硬件耗时统计），后台执行并显示进度"""
+        try:
+            log_file = get_log_file(self.logger)
+            if not log_file:
+                raise Exception("日志文件不存在")
+            out_path = filedialog.asksaveasfilename(
+                defaultextension=".zip",
+                filetypes=[("压缩包", "*.zip")],
+                initialfile=f"iGameFans_diagnostics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                title="导出诊断包"
+            )
+            if not out_path:
+                return
+
+            self.telemetry_writer.flush()
+            bundle = DiagnosticsBundle(
+                out_path,
+                log_dir=os.path.dirname(log_file),
+                config_files=[get_file_path("conf", "fan_config.json"), self.setting_config_path],
+                telemetry_dir=self.telemetry_writer.directory,
+                diagnostics=self._collect_diagnostics(),
+            )
+            bundle.start()
+        except Exception as e:
+            error_msg = f"导出诊断包失败：{str(e)}"
+            self.logger.error(error_msg)
+            messagebox.showerror("失败", error_msg)
+            return
+
+        # 进度窗口
+        progress_window = tk.Toplevel(self.root)
+        progress_window.title("导出诊断包")
+        progress_window.resizable(False, False)
+        progress_window.transient(self.root)
+        status_var = tk.StringVar(value="正在准备...")
+        ttk.Label(progress_window, textvariable=status_var, width=50).pack(padx=20, pady=(20, 10))
+        progress_bar = ttk.Progressbar(progress_window, length=360, maximum=100)
+        progress_bar.pack(padx=20, pady=5)
+        ttk.Button(progress_window, text="取消", command=bundle.cancel,
+                   style="Custom.TButton").pack(pady=(10, 20))
+        progress_window.protocol("WM_DELETE_WINDOW", bundle.cancel)
+
+        def poll():
+            if not bundle.done:
+                progress_bar["value"] = bundle.progress * 100
+                status_var.set(f"正在写入：{bundle.current}（{bundle.done_bytes // 1024} / "
+                               f"{bundle.total_bytes // 1024} KB）")
+                self.root.after(100, poll)
+                return
+            progress_window.destroy()
+            if bundle.error:
+                error_msg = f"导出诊断包失败：{str(bundle.error)}"
+                self.logger.error(error_msg)
+                messagebox.showerror("失败", error_msg)
+            elif not os.path.exists(out_path):
+                self.logger.info("已取消导出诊断包")
+            else:
+                self.logger.info("诊断包已导出：%s", out_path)
+                message = f"诊断包已保存至：\n{out_path}"
+                if bundle.skipped:
+                    message += f"\n（{len(bundle.skipped)}个文件在导出期间被切分，已跳过）"
+                messagebox.showinfo("成功", message)
+
+        poll()
+
     def on_close(self):
         """程序关闭处理"""
         self.is_monitoring = False
@@ -2034,7 +2434,9 @@ class FanCurveGUI:
         self.controller.restore_default_mode()  # 恢复默认风扇模式
         self.controller.save_config()  # 保存最终配置
         self.save_setting_config()
-        self.logger.info("程序已关闭")
+        self.telemetry_writer.close()
+        self.history_store.stop()
+        self.logger.info("程序已关闭（监控日志共省略%s条）", self.log_policy.total_suppressed)
         # plt.close(self.fig)  # 关闭图表
         self.root.destroy()
 
@@ -2187,6 +2589,8 @@ class TrayApp:
         self.root.deiconify()
         self.root.state('normal')
         self.root.lift()
+        # 还原后立即恢复历史曲线的正常刷新（不等待低频检查）
+        self.root.after(0, self.main_gui.history_chart.start)
 
     def exit_app(self):
         """退出程序"""
@@ -2199,21 +2603,32 @@ class TrayApp:
 
 def init_logging():
     """初始化日志系统"""
-    log_filename = f"fan_control_log_{datetime.now().strftime('%Y%m%d')}.txt"
-    log_path = get_file_path("logs", log_filename)
+    log_dir = get_file_path("logs", "")
+    os.makedirs(log_dir, exist_ok=True)
 
-    log_format = logging.Formatter('%(asctime)s - %(message)s', datefmt='%H:%M:%S')
-    log_handler = RotatingFileHandler(
-        log_path,
+    log_format = TaggedFormatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S')
+    # 按天+按大小切分，切分后的分段由后台线程压缩并限制总占用
+    log_handler = DailyRotatingFileHandler(
+        log_dir,
         maxBytes=1024 * 1024,  # 1MB
-        backupCount=5,
+        backupCount=50,
         encoding='utf-8'
     )
     log_handler.setFormatter(log_format)
+    retention = LogRetentionManager(log_handler, max_total_bytes=50 * 1024 * 1024)
+    retention.start()
+    atexit.register(retention.stop)
+
+    # 写盘放到后台监听线程，调用方只做非阻塞入队
+    queue_handler = DropQueueHandler(maxsize=10000)
+    listener = DropReportingListener(queue_handler, log_handler)
+    queue_handler.listener = listener
+    listener.start()
+    atexit.register(listener.stop)
 
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
-    logger.addHandler(log_handler)
+    logger.addHandler(queue_handler)
 
     return logger
 